@@ -1,79 +1,230 @@
-import json
+import bisect
+import heapq
+import itertools
 import os
-import re
+import queue
 import shutil
+import sys
+import threading
+import time
+import tkinter
 import webbrowser
+from collections import OrderedDict
 from tkinter import filedialog, messagebox
 
 import customtkinter as ctk
 from PIL import Image
 
-# --- Constants ---
-DATA_FILE = 'bottles.json'
-IMAGE_DIR = 'images'
-
-
-# --- Backend Functions ---
-
-def load_data():
-    """Loads bottle data from the JSON file."""
-    if not os.path.exists(DATA_FILE) or os.stat(DATA_FILE).st_size == 0:
-        return []
-    with open(DATA_FILE, 'r') as f:
-        try:
-            data = json.load(f)
-            # Backward compatibility for old single-image format
-            for item in data:
-                if 'image_path' in item and 'image_paths' not in item:
-                    item['image_paths'] = [item['image_path']] if item['image_path'] else []
-                    del item['image_path']
-            return data
-        except json.JSONDecodeError:
-            messagebox.showerror("Error", "Could not decode JSON. Starting with empty data.")
-            return []
-
-
-def save_data(data):
-    """Saves bottle data to the JSON file."""
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
-
-
-def generate_id(data):
-    """Generates a new unique ID for a bottle."""
-    if not data:
-        return "BTL001"
-    last_id_num = 0
-    for item in data:
-        if 'id' in item and item['id'].startswith("BTL") and item['id'][3:].isdigit():
-            num = int(item['id'][3:])
-            if num > last_id_num:
-                last_id_num = num
-    new_num = last_id_num + 1
-    return f"BTL{new_num:03d}"
-
-
-def find_bottle_by_id(bottle_id, bottles):
-    """Finds a bottle and its index by its ID."""
-    for i, bottle in enumerate(bottles):
-        if bottle.get('id') == bottle_id:
-            return bottle, i
-    return None, -1
+from entrydex_core import (
+    FIELDS, IMAGE_DIR, LOAD_BATCH_SIZE, STAGING_DIR, THUMB_SIZES, Bottle, BottleCollection, ChangeTracker,
+    CollectionColumns, ImageRefs, PersistenceWorker, ReportAggregates, SearchIndex, TRACE_LOG_FILE, export_entries,
+    export_html, file_size, get_storage, ingest_image, invalidate_thumbnails, is_staged, iter_report, load_thumbnail,
+    make_thumbnail, read_import, store_image, store_image_file, thumbnail_path, traced, tracer, worker_pool,
+)
+
+# --- Image Settings ---
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024  # Memory budget for decoded preview images
+IMAGE_LOADER_THREADS = 4  # Workers decoding card thumbnails off the UI thread
+INGEST_WORKERS = None  # Processes decoding imported images; None uses every CPU
+
+# --- Startup Settings ---
+PROGRESSIVE_LOAD = True  # Show the window first and stream the collection in behind it
+
+# --- View Settings ---
+CARD_ROW_HEIGHT = 340  # Assumed height of an EntryCard until it has been built and measured
+CARD_ROW_GAP = 10  # Vertical space between two cards
+CARD_OVERSCAN_ROWS = 2  # Cards kept built above and below the viewport
+
+# --- Search Settings ---
+SEARCH_DEBOUNCE_MS = 250  # Pause in typing before a live search runs
+SEARCH_RESULT_LIMIT = 500  # Result buttons shown at most; refine the query to see others
+RESULTS_PER_TICK = 100  # Result buttons (re)configured per event-loop tick
+
+# --- Report Settings ---
+REPORT_LINES_PER_TICK = 300  # Report lines inserted into the textbox per event-loop tick
+REPORT_PAGE_LINES = 200  # Lines a report section shows before offering the next page
+
+
+# --- Images ---
+
+class ImageHandle:
+    """An image in the editor: the file it comes from plus the edits still to apply to it.
+
+    Edits such as rotations are only recorded; the preview shows them on
+    the cached thumbnail, and render() applies them at full resolution
+    when the entry is saved. No file is kept open in between.
+    """
+
+    __slots__ = ("path", "transforms")
+
+    def __init__(self, path):
+        self.path = path
+        self.transforms = []  # (operation, argument) in the order they were made
+
+    @property
+    def is_modified(self):
+        return bool(self.transforms)
+
+    @property
+    def rotation(self):
+        """Clockwise degrees the pending transforms turn the image by."""
+        return sum(degrees for operation, degrees in self.transforms if operation == 'rotate') % 360
+
+    def rotate(self, degrees=90):
+        """Records a clockwise rotation, merged with the previous one so a full turn is no edit at all."""
+        if self.transforms and self.transforms[-1][0] == 'rotate':
+            degrees += self.transforms.pop()[1]
+        if degrees % 360:
+            self.transforms.append(('rotate', degrees % 360))
+
+    def render(self):
+        """Decodes the source and returns it with the pending transforms applied."""
+        with Image.open(self.path) as image:
+            image.load()
+        for operation, argument in self.transforms:
+            if operation == 'rotate':
+                image = image.rotate(-argument, expand=True)
+        return image
+
+
+class ImageCache:
+    """LRU cache of ready-to-display images, keyed by (path, size, rotation).
+
+    Bounded by an estimate of the memory the images hold rather than by a
+    number of entries, and counts hits and misses for stats().
+    """
+
+    def __init__(self, max_bytes=IMAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (image, estimated bytes)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, key):
+        """Returns the cached image for `key`, or None, without counting a hit or a miss."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def put(self, key, image, size_bytes):
+        if key in self._entries:
+            self.size_bytes -= self._entries.pop(key)[1]
+        if size_bytes > self.max_bytes:
+            return
+        self._entries[key] = (image, size_bytes)
+        self.size_bytes += size_bytes
+        while self.size_bytes > self.max_bytes:
+            _, (_, freed) = self._entries.popitem(last=False)
+            self.size_bytes -= freed
+
+    def invalidate(self, path):
+        """Drops every cached image of `path`."""
+        for key in [key for key in self._entries if key[0] == path]:
+            self.size_bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries), "bytes": self.size_bytes, "max_bytes": self.max_bytes}
+
+
+class ImageTicket:
+    """One queued thumbnail decode. Cancelling it drops the work if no worker has started on it yet."""
+
+    __slots__ = ("path", "size", "callback", "cancelled")
+
+    def __init__(self, path, size, callback):
+        self.path = path
+        self.size = size
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class ImageLoader:
+    """Decodes thumbnails on a pool of worker threads.
+
+    Requests are served lowest priority first, then in order. Decoded
+    images wait in a queue until poll() is called from the Tk main thread,
+    which runs the callbacks of tickets that were not cancelled meanwhile.
+    """
+
+    def __init__(self, threads=IMAGE_LOADER_THREADS):
+        self._requests = queue.PriorityQueue()
+        self._results = queue.Queue()
+        self._order = itertools.count()
+        self.pending = 0
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def request(self, path, size, callback, priority=0):
+        """Queues a decode of `path` at `size`; `callback(pil_image)` gets None if decoding fails."""
+        ticket = ImageTicket(path, tuple(size), callback)
+        self.pending += 1
+        self._requests.put((priority, next(self._order), ticket))
+        return ticket
+
+    def poll(self, limit=None):
+        """Runs the callbacks of finished decodes. Call from the main thread only."""
+        handled = 0
+        while limit is None or handled < limit:
+            try:
+                ticket, image = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            handled += 1
+            if not ticket.cancelled:
+                ticket.callback(image)
+        return handled
+
+    def close(self):
+        for _ in self._threads:
+            self._requests.put((float('inf'), next(self._order), None))
+
+    def _run(self):
+        while True:
+            _, _, ticket = self._requests.get()
+            if ticket is None:
+                return
+            image = None
+            if not ticket.cancelled:
+                try:
+                    image = load_thumbnail(ticket.path, ticket.size)
+                except Exception as e:
+                    print(f"Error loading image from path {ticket.path}: {e}")
+            self._results.put((ticket, image))
 
 
 # --- Custom Widget for Viewing Entries ---
 
 class EntryCard(ctk.CTkFrame):
-    """A custom widget to display a single bottle entry with an image gallery."""
+    """A custom widget to display a single bottle entry with an image gallery.
+
+    A card can be rebound to another entry with bind_bottle(), reusing its
+    widgets, which is how VirtualCardList recycles cards while scrolling.
+    """
 
     def __init__(self, master, bottle_data, app_instance):
         super().__init__(master, border_width=1)
-        self.bottle_data = bottle_data
         self.app = app_instance
-        self.image_paths = self.bottle_data.get("image_paths", [])
+        self.bottle_data = None
+        self.image_paths = []
         self.current_image_index = 0
-
-        self.pack(fill="x", padx=20, pady=5)
+        self.image_ticket = None
+        self.image_priority = 0
 
         self.grid_columnconfigure(1, weight=1)
 
@@ -99,51 +250,74 @@ class EntryCard(ctk.CTkFrame):
         self.details_frame.grid_columnconfigure(0, weight=1)
 
         self.create_details_widgets()
+        if bottle_data is not None:
+            self.bind_bottle(bottle_data)
+
+    def bind_bottle(self, bottle_data):
+        """Shows `bottle_data` in this card, reusing the existing widgets."""
+        self.bottle_data = bottle_data
+        self.image_paths = self.bottle_data.get("image_paths", [])
+        self.current_image_index = 0
+        self.update_details()
         self.update_image_display()
 
     def create_details_widgets(self):
-        row = 0
-        id_name_text = f"{self.bottle_data.get('id', 'N/A')} - {self.bottle_data.get('name', 'N/A')}"
-        id_label = ctk.CTkLabel(self.details_frame, text=id_name_text, font=ctk.CTkFont(weight="bold"), justify="left",
-                                anchor="w")
-        id_label.grid(row=row, column=0, sticky="w", padx=5, pady=(0, 2))
-        row += 1
+        self.id_label = ctk.CTkLabel(self.details_frame, text="", font=ctk.CTkFont(weight="bold"), justify="left",
+                                     anchor="w")
+        self.id_label.grid(row=0, column=0, sticky="w", padx=5, pady=(0, 2))
+        self.links_header = ctk.CTkLabel(self.details_frame, text="Related Links:", justify="left", anchor="w")
+        # Grown on demand and shared by every entry the card shows.
+        self.detail_labels = []
+        self.link_labels = []
+        self.link_urls = []
+        self.link_font = ctk.CTkFont(underline=True)
+
+    def update_details(self):
+        self.id_label.configure(text=f"{self.bottle_data.get('id', 'N/A')} - {self.bottle_data.get('name', 'N/A')}")
+        row = 1
 
         fields_to_display = self.app.fields[1:] + [("Related Addresses:", "addresses")]
+        details = []
         for label, key in fields_to_display:
             value = self.bottle_data.get(key, "").strip()
             if value:
-                label_text = label
-                detail_label = ctk.CTkLabel(
+                details.append(f"{label} {value}")
+        for i, text in enumerate(details):
+            if i == len(self.detail_labels):
+                self.detail_labels.append(ctk.CTkLabel(self.details_frame, justify="left", anchor="w",
+                                                       wraplength=self.details_frame.winfo_width() - 20))
+            self.detail_labels[i].configure(text=text)
+            self.detail_labels[i].grid(row=row, column=0, sticky="we", padx=5, pady=(2, 0))
+            row += 1
+        for detail_label in self.detail_labels[len(details):]:
+            detail_label.grid_remove()
+
+        links = [link.strip() for link in self.bottle_data.get("links", "").splitlines() if link.strip()]
+        if links:
+            self.links_header.grid(row=row, column=0, sticky="w", padx=5, pady=(5, 0))
+            row += 1
+        else:
+            self.links_header.grid_remove()
+        for i, link in enumerate(links):
+            if i == len(self.link_labels):
+                link_label = ctk.CTkLabel(
                     self.details_frame,
-                    text=f"{label_text} {value}",
+                    text_color="#3399FF",
+                    cursor="hand2",
+                    font=self.link_font,
                     justify="left",
                     anchor="w",
                     wraplength=self.details_frame.winfo_width() - 20
                 )
-                detail_label.grid(row=row, column=0, sticky="we", padx=5, pady=(2, 0))
-                row += 1
-
-        links_text = self.bottle_data.get("links", "").strip()
-        if links_text:
-            links_header = ctk.CTkLabel(self.details_frame, text="Related Links:", justify="left", anchor="w")
-            links_header.grid(row=row, column=0, sticky="w", padx=5, pady=(5, 0))
+                link_label.bind("<Button-1>", lambda event, index=i: webbrowser.open(self.link_urls[index]))
+                self.link_labels.append(link_label)
+                self.link_urls.append(link)
+            self.link_urls[i] = link
+            self.link_labels[i].configure(text=link)
+            self.link_labels[i].grid(row=row, column=0, sticky="w", padx=5)
             row += 1
-            for link in links_text.splitlines():
-                if link.strip():
-                    link_label = ctk.CTkLabel(
-                        self.details_frame,
-                        text=link.strip(),
-                        text_color="#3399FF",
-                        cursor="hand2",
-                        font=ctk.CTkFont(underline=True),
-                        justify="left",
-                        anchor="w",
-                        wraplength=self.details_frame.winfo_width() - 20
-                    )
-                    link_label.grid(row=row, column=0, sticky="w", padx=5)
-                    link_label.bind("<Button-1>", lambda event, url=link.strip(): webbrowser.open(url))
-                    row += 1
+        for link_label in self.link_labels[len(links):]:
+            link_label.grid_remove()
 
     def on_details_frame_configure(self, event):
         wrap_width = event.width - 20
@@ -152,9 +326,10 @@ class EntryCard(ctk.CTkFrame):
                 widget.configure(wraplength=wrap_width)
 
     def update_image_display(self):
+        self.cancel_image_load()
         if self.image_paths:
-            self.app._update_image_preview(
-                self.img_label, path=self.image_paths[self.current_image_index], size=(250, 250)
+            self.image_ticket = self.app.request_preview(
+                self.img_label, self.image_paths[self.current_image_index], (250, 250), self.image_priority
             )
             self.image_counter_label.configure(text=f"{self.current_image_index + 1} / {len(self.image_paths)}")
         else:
@@ -162,6 +337,15 @@ class EntryCard(ctk.CTkFrame):
             self.image_counter_label.configure(text="0 / 0")
         self.update_controls_visibility()
 
+    def cancel_image_load(self):
+        if self.image_ticket is not None:
+            self.image_ticket.cancel()
+            self.image_ticket = None
+
+    def destroy(self):
+        self.cancel_image_load()
+        super().destroy()
+
     def update_controls_visibility(self):
         if len(self.image_paths) > 1:
             self.prev_button.grid(row=0, column=0, sticky="w", padx=5)
@@ -189,6 +373,227 @@ class EntryCard(ctk.CTkFrame):
             self.update_image_display()
 
 
+class VirtualCardList(ctk.CTkFrame):
+    """A scrolling list of EntryCards that only builds cards near the viewport.
+
+    Each row is as tall as its card: a card is measured every time it is
+    bound to an entry, and rows not measured yet count as CARD_ROW_HEIGHT.
+    A table of row offsets maps the scroll position to the rows on screen.
+    Cards that scroll out of range go back to a pool and are rebound to the
+    entries scrolling in, which keeps the cost of a scroll independent of
+    the collection size.
+    """
+
+    def __init__(self, master, app_instance, empty_text=""):
+        super().__init__(master)
+        self.app = app_instance
+        self.empty_text = empty_text
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.canvas = ctk.CTkCanvas(self, highlightthickness=0, bd=0, yscrollincrement=40,
+                                    bg=self._apply_appearance_mode(self._fg_color))
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.empty_label = ctk.CTkLabel(self, text="")
+
+        self.item_ids = []
+        self.heights = {}  # bottle id -> measured row height, gap included
+        self.offsets = [0]  # row -> top of the row; the last item is the total height
+        self.visible = {}  # row -> (card, canvas window id)
+        self.window_tops = {}  # canvas window id -> y it was last placed at
+        self.pool = []  # (card, canvas window id) currently hidden
+        self.relayout_job = None
+
+        self.canvas.bind("<Configure>", self._on_resize)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind_all(sequence, self._on_mouse_wheel, add="+")
+
+    def _set_appearance_mode(self, mode_string):
+        super()._set_appearance_mode(mode_string)
+        self.canvas.configure(bg=self._apply_appearance_mode(self._fg_color))
+
+    def set_items(self, item_ids):
+        """Shows the entries with `item_ids`, in that order. Cards already showing the right entry are kept."""
+        self.item_ids = item_ids
+        self._update_offsets()
+        self._update_scroll_region()
+        self._render()
+
+    def patch_items(self, added, removed):
+        """Inserts `added` into and drops `removed` from the sorted rows.
+
+        Only the offsets from the first changed row on are recomputed, so
+        adding an entry at the end costs the same for any collection size.
+        """
+        item_ids = self.item_ids
+        first = len(item_ids)
+        for bottle_id in removed:
+            i = bisect.bisect_left(item_ids, bottle_id)
+            if i < len(item_ids) and item_ids[i] == bottle_id:
+                del item_ids[i]
+                first = min(first, i)
+        for bottle_id in added:
+            i = bisect.bisect_left(item_ids, bottle_id)
+            item_ids.insert(i, bottle_id)
+            first = min(first, i)
+        self._update_offsets(min(first, len(self.offsets) - 1))
+        self._update_scroll_region()
+        self._render()
+
+    def _update_offsets(self, start=0):
+        """Recomputes the row offsets from row `start` on."""
+        heights = self.heights
+        top = self.offsets[start]
+        del self.offsets[start:]
+        self.offsets.extend(itertools.accumulate((heights.get(bottle_id, CARD_ROW_HEIGHT)
+                                                  for bottle_id in self.item_ids[start:]), initial=top))
+
+    def _update_scroll_region(self):
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), self.offsets[-1]))
+        if self.item_ids:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.configure(text=self.empty_text)
+            self.empty_label.place(relx=0.5, y=20, anchor="n")
+
+    @traced("render_cards", lambda _, cards: {"items": len(cards.visible)})
+    def _render(self):
+        top = self.canvas.canvasy(0)
+        first_visible = max(0, bisect.bisect_right(self.offsets, top) - 1)
+        last_visible = min(len(self.item_ids), bisect.bisect_left(self.offsets, top + self.canvas.winfo_height()))
+        first = max(0, first_visible - CARD_OVERSCAN_ROWS)
+        last = min(len(self.item_ids), last_visible + CARD_OVERSCAN_ROWS)
+
+        for row in [row for row in self.visible if not first <= row < last]:
+            self._hide(row)
+
+        resized = False
+        for row in range(first, last):
+            bottle_id = self.item_ids[row]
+            bottle = self.app.bottles_data.get(bottle_id)
+            if bottle is None:
+                # Deleted since the rows were set; the view drops the row when it applies the changes.
+                if row in self.visible:
+                    self._hide(row)
+                continue
+            if row in self.visible:
+                card, window = self.visible[row]
+                if card.bottle_data is not None and card.bottle_data.get('id') == bottle_id:
+                    self._place(window, row)  # Rows above it may have been added, removed or resized
+                    continue
+            elif self.pool:
+                card, window = self.pool.pop()
+            else:
+                card = EntryCard(self.canvas, None, self.app)
+                # No fixed height: the window follows the card's requested height.
+                window = self.canvas.create_window(10, 0, anchor="nw", window=card, width=self._card_width())
+                card.bind("<Configure>", lambda event, card=card: self._on_card_configure(card))
+            self._place(window, row)
+            self.canvas.itemconfigure(window, state="normal")
+            # Rows on screen decode their images before the overscan rows.
+            card.image_priority = 0 if first_visible <= row < last_visible else 1
+            card.bind_bottle(bottle)
+            self.visible[row] = (card, window)
+            resized |= self._measure(card)
+        if resized:
+            self._schedule_relayout()
+
+    def _place(self, window, row):
+        top = self.offsets[row] + CARD_ROW_GAP // 2
+        if self.window_tops.get(window) != top:
+            self.window_tops[window] = top
+            self.canvas.coords(window, 10, top)
+
+    def _hide(self, row):
+        card, window = self.visible.pop(row)
+        card.cancel_image_load()
+        self.canvas.itemconfigure(window, state="hidden")
+        self.pool.append((card, window))
+
+    def _measure(self, card):
+        """Records the height `card` needs for its entry; returns True if it changed."""
+        card.update_idletasks()
+        height = card.winfo_reqheight() + CARD_ROW_GAP
+        bottle_id = card.bottle_data.get('id')
+        if self.heights.get(bottle_id) == height:
+            return False
+        self.heights[bottle_id] = height
+        return True
+
+    def _on_card_configure(self, card):
+        # Label wrapping follows the card width, so a card can change height after it was measured.
+        if card.bottle_data is not None and card.winfo_ismapped() and self._measure(card):
+            self._schedule_relayout()
+
+    def _schedule_relayout(self):
+        if self.relayout_job is None:
+            self.relayout_job = self.after_idle(self._relayout)
+
+    def _relayout(self):
+        """Moves the built cards to their new offsets after some rows changed height."""
+        self.relayout_job = None
+        self._update_offsets()
+        self._update_scroll_region()
+        for row, (_, window) in self.visible.items():
+            self._place(window, row)
+        # Rows that shrank can leave room for more cards at the bottom of the viewport.
+        self._render()
+
+    def rebind(self, bottle_ids=None):
+        """Re-reads the built cards showing `bottle_ids` (default: all of them) from the collection."""
+        resized = False
+        for card, _ in self.visible.values():
+            bottle_id = card.bottle_data.get('id')
+            bottle = self.app.bottles_data.get(bottle_id)
+            if bottle is not None and (bottle_ids is None or bottle_id in bottle_ids):
+                card.bind_bottle(bottle)
+                resized |= self._measure(card)
+        if resized:
+            self._schedule_relayout()
+
+    def _card_width(self):
+        return max(self.canvas.winfo_width() - 20, 100)
+
+    def _on_resize(self, event):
+        for _, window in list(self.visible.values()) + self.pool:
+            self.canvas.itemconfigure(window, width=self._card_width())
+        self._update_scroll_region()
+        self._render()
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self._render()
+
+    def _on_mouse_wheel(self, event):
+        if not self._is_inside(event.widget):
+            return
+        if event.num == 4:
+            units = -3
+        elif event.num == 5:
+            units = 3
+        elif sys.platform == "darwin":
+            units = -event.delta
+        else:
+            units = -3 * event.delta // 120
+        self.canvas.yview_scroll(units, "units")
+        self._render()
+
+    def _is_inside(self, widget):
+        if isinstance(widget, str):
+            try:
+                widget = self.nametowidget(widget)
+            except (KeyError, tkinter.TclError):
+                return False
+        while widget is not None:
+            if widget is self.canvas:
+                return self.winfo_ismapped()
+            widget = getattr(widget, "master", None)
+        return False
+
+
 # --- Main Application Class ---
 
 class EntryDexApp(ctk.CTk):
@@ -214,22 +619,42 @@ class EntryDexApp(ctk.CTk):
         self.grid_rowconfigure(0, weight=1)
 
         # --- Data & State ---
-        self.bottles_data = load_data()
+        self.storage = get_storage()
+        self.bottles_data = BottleCollection()
+        self.search_index = SearchIndex()
+        self.bottles_data.add_observer(self.search_index)
+        self.view_changes = ChangeTracker()
+        self.bottles_data.add_observer(self.view_changes)
+        self.image_refs = ImageRefs()
+        self.bottles_data.add_observer(self.image_refs)
+        self.report_aggregates = ReportAggregates()
+        self.bottles_data.add_observer(self.report_aggregates)
+        self.analytics = CollectionColumns()
+        self.bottles_data.add_observer(self.analytics)
+        self.is_loading = False
+        if not PROGRESSIVE_LOAD:
+            try:
+                self.bottles_data.extend(self.storage.load())
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not load the collection ({e}). Starting with empty data; "
+                                              "the unreadable file is left as it is.")
+        self.persistence = PersistenceWorker(self.storage, on_error=self._on_save_error)
         self.view_is_dirty = True
         self.current_edit_bottle_id = None
-        self.add_images_pils = []
+        self.add_images = []
         self.add_image_index = 0
-        self.edit_images_pils = []
+        self.edit_images = []
         self.edit_image_index = 0
+        self.image_cache = ImageCache()
+        self.image_loader = ImageLoader()
+        self.image_poll_job = None
+        self.ingest_pool = None  # Started on the first image import
+        self.ingest_counter = itertools.count()
+        self.performance_window = None
+        shutil.rmtree(STAGING_DIR, ignore_errors=True)  # Imports left over from the last session
 
         # --- Field Definitions ---
-        self.fields = [
-            ("Name:", "name"), ("Type/Category:", "type"),
-            ("Color:", "color"), ("Era/Date Range:", "era"),
-            ("Condition:", "condition"), ("Embossing/Markings:", "embossing"),
-            ("Closure Type:", "closure_type"), ("Finish Type:", "finish_type"),
-            ("Base Markings:", "base_markings"), ("Location in Collection:", "location")
-        ]
+        self.fields = FIELDS
 
         # --- Image Placeholders ---
         self.placeholder_image = ctk.CTkImage(
@@ -247,7 +672,92 @@ class EntryDexApp(ctk.CTk):
         self._create_sidebar()
         self._create_main_content_area()
 
+        if PROGRESSIVE_LOAD:
+            self._start_progressive_load()
+        else:
+            self._warm_search_index()
         self.show_view_frame()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        # Leave a single self-contained bottles.json behind on exit.
+        self.persistence.flush()
+        if not self.is_loading and self.storage.wants_snapshot(closing=True):
+            self.persistence.save(self.bottles_data)
+        self.persistence.close()
+        if self.persistence.error is not None:
+            messagebox.showerror("Error", f"Some changes could not be saved ({self.persistence.error}).")
+        self.image_loader.close()
+        if self.ingest_pool is not None:
+            self.ingest_pool.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
+    def _on_save_error(self, error):
+        # Called on the writer thread; the message box has to open on the Tk thread.
+        self.after(0, lambda: messagebox.showerror(
+            "Error", f"Could not save your changes ({error}). They are kept and saving is retried "
+                     "in the background."))
+
+    # --- Progressive Loading ---
+    def _start_progressive_load(self):
+        """Parses the collection on a background thread and feeds it to the GUI in batches."""
+        self.is_loading = True
+        self.load_started = time.perf_counter()
+        self.view_is_dirty = False  # The view fills itself from the incoming batches
+        self.frames["ViewAllFrame"].begin_loading()
+        self._load_queue = queue.Queue()
+        threading.Thread(target=self._load_worker, name="EntryDexLoader", daemon=True).start()
+        self.after(10, self._drain_load_queue)
+
+    def _load_worker(self):
+        try:
+            for batch, progress in self.storage.iter_batches(LOAD_BATCH_SIZE):
+                self._load_queue.put(("batch", [Bottle(item) for item in batch], progress))
+            self._load_queue.put(("done", None, 1.0))
+        except Exception as e:
+            self._load_queue.put(("error", e, 1.0))
+
+    def _drain_load_queue(self):
+        # Hand over a few batches per tick so the window keeps repainting.
+        deadline = time.perf_counter() + 0.03
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload, progress = self._load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "batch":
+                self.bottles_data.extend(payload)
+                self.frames["ViewAllFrame"].append_entries(progress)
+            else:
+                self._finish_progressive_load(payload if kind == "error" else None)
+                return
+        self.after(10, self._drain_load_queue)
+
+    def _finish_progressive_load(self, error):
+        self.is_loading = False
+        if tracer.enabled:
+            tracer.record("load_data", time.perf_counter() - self.load_started, items=len(self.bottles_data),
+                          progressive=True)
+        if error is not None:
+            messagebox.showerror("Error", f"Could not load the collection ({error}). Starting with empty data; "
+                                          "the unreadable file is left as it is.")
+            self.bottles_data.clear()
+        elif self.storage.legacy_upgraded:
+            self.persistence.save(self.bottles_data)
+        self.frames["ViewAllFrame"].end_loading()
+        self._warm_search_index()
+
+    def _warm_search_index(self):
+        # Build the search index a slice at a time so the first search is instant.
+        if not self.search_index.index_pending(limit=200):
+            self.after(1, self._warm_search_index)
+
+    def ensure_loaded(self):
+        """Tells the user to wait if the collection is still streaming in; returns False in that case."""
+        if self.is_loading:
+            messagebox.showinfo("Loading", "The collection is still loading. Please try again in a moment.")
+            return False
+        return True
 
     def _create_sidebar(self):
         sidebar_frame = ctk.CTkFrame(self, width=180, corner_radius=0)
@@ -269,6 +779,8 @@ class EntryDexApp(ctk.CTk):
         ctk.CTkLabel(sidebar_frame, text="Appearance Mode:", anchor="w").grid(row=6, column=0, padx=20, pady=(10, 0))
         ctk.CTkOptionMenu(sidebar_frame, values=["Light", "Dark", "System"], command=ctk.set_appearance_mode).grid(
             row=7, column=0, padx=20, pady=(10, 20))
+        ctk.CTkButton(sidebar_frame, text="Performance", fg_color="transparent", border_width=1,
+                      command=self.show_performance_panel).grid(row=8, column=0, padx=20, pady=(0, 20))
 
     def _create_main_content_area(self):
         self.main_content_frame = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
@@ -294,6 +806,8 @@ class EntryDexApp(ctk.CTk):
         if self.view_is_dirty:
             self.frames["ViewAllFrame"].refresh_view()
             self.view_is_dirty = False
+        elif self.view_changes:
+            self.frames["ViewAllFrame"].apply_changes(*self.view_changes.drain())
         self.show_frame("ViewAllFrame")
 
     def show_search_edit_delete_frame(self):
@@ -305,51 +819,356 @@ class EntryDexApp(ctk.CTk):
 
     def show_reports_frame(self):
         self.show_frame("ReportsFrame")
-        self.frames["ReportsFrame"].generate_report("type")
+        self.frames["ReportsFrame"].refresh()
+
+    # --- Performance Panel ---
+    def show_performance_panel(self):
+        """Opens (or raises) a window with the recent timings of the traced operations and the cache hit rates."""
+        if self.performance_window is not None and self.performance_window.winfo_exists():
+            self.performance_window.focus()
+            return
+        window = ctk.CTkToplevel(self)
+        window.title("EntryDex Performance")
+        window.geometry("760x480")
+        tracing = ctk.BooleanVar(value=tracer.enabled)
+
+        def toggle():
+            tracer.enabled = tracing.get()
+
+        ctk.CTkSwitch(window, text=f"Record timings (also logged to {TRACE_LOG_FILE})", variable=tracing,
+                      command=toggle).pack(anchor="w", padx=20, pady=(20, 10))
+        textbox = ctk.CTkTextbox(window, font=ctk.CTkFont(family="Courier"), wrap="none")
+        textbox.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        self.performance_window = window
+        self._refresh_performance_panel(textbox)
+
+    def _refresh_performance_panel(self, textbox):
+        if not textbox.winfo_exists():
+            return
+        lines = [f"{'Operation':<22}{'Calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'Items':>10}{'MB':>9}"]
+        for operation, stats in sorted(tracer.summary().items()):
+            lines.append(f"{operation:<22}{stats['calls']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+                         f"{stats['max_ms']:>10.1f}{stats['items']:>10}{stats['bytes'] / 1e6:>9.1f}")
+        if len(lines) == 1:
+            lines.append("Nothing recorded yet." if tracer.enabled else
+                         "Timings are off. Turn them on above, or start the app with ENTRYDEX_TRACE=1.")
+        cache = self.image_cache.stats()
+        preview_cache = (f"preview images ({cache['entries']} kept, "
+                         f"{cache['bytes'] / 1e6:.1f} of {cache['max_bytes'] / 1e6:.0f} MB)")
+        caches = {preview_cache: (cache["hits"], cache["misses"]), **tracer.hit_rates()}
+        lines += ["", "Cache hit rates"]
+        for name, (hits, misses) in caches.items():
+            rate = f"{hits / (hits + misses):.1%}" if hits + misses else "-"
+            lines.append(f"  {name:<44}{rate:>7} of {hits + misses} lookups")
+        textbox.configure(state="normal")
+        textbox.delete("1.0", "end")
+        textbox.insert("1.0", "\n".join(lines))
+        textbox.configure(state="disabled")
+        self.after(1000, self._refresh_performance_panel, textbox)
 
     # --- Image Handling ---
-    def _update_image_preview(self, image_label, pil_image=None, path=None, size=(300, 300)):
-        img_to_display = None
-        if pil_image is not None:
-            img_to_display = pil_image
-        elif path and os.path.exists(path):
+    @traced("update_image_preview")
+    def _update_image_preview(self, image_label, handle=None, path=None, size=(300, 300)):
+        """Shows `handle` (or the image at `path`) with its pending edits, or a placeholder for neither."""
+        rotation = 0
+        if handle is not None:
+            path, rotation = handle.path, handle.rotation
+        if path and os.path.exists(path):
+            key = (path, tuple(size), rotation)
+            ctk_img = self.image_cache.get(key)
+            if ctk_img is not None:
+                image_label.configure(image=ctk_img)
+                return
             try:
-                img_to_display = Image.open(path)
+                img_copy = load_thumbnail(path, size)
+                if rotation:
+                    img_copy = img_copy.rotate(-rotation, expand=True)
+                ctk_img = self._make_ctk_image(img_copy)
+                self.image_cache.put(key, ctk_img, self._image_bytes(img_copy))
+                image_label.configure(image=ctk_img)
+                return
             except Exception as e:
                 print(f"Error loading image from path {path}: {e}")
 
-        if img_to_display:
-            img_copy = img_to_display.copy()
-            img_copy.thumbnail(size, Image.Resampling.LANCZOS)
-            ctk_img = ctk.CTkImage(light_image=img_copy, dark_image=img_copy,
-                                   size=(img_copy.width, img_copy.height))
-            image_label.configure(image=ctk_img)
-        else:
-            w, h = size
-            w = max(10, int(w))
-            h = max(10, int(h))
+        w, h = size
+        w = max(10, int(w))
+        h = max(10, int(h))
+        key = (None, (w, h), 0)
+        ctk_img = self.image_cache.peek(key)  # Placeholders are not previews; keep them out of the stats
+        if ctk_img is None:
             bg_light = "#E0E0E0"
             bg_dark = "#2A2A2A"
             ph_light = Image.new("RGB", (w, h), bg_light)
             ph_dark = Image.new("RGB", (w, h), bg_dark)
             ctk_img = ctk.CTkImage(light_image=ph_light, dark_image=ph_dark, size=(w, h))
+            self.image_cache.put(key, ctk_img, 2 * self._image_bytes(ph_light))
+        image_label.configure(image=ctk_img)
+
+    def request_preview(self, image_label, path, size, priority=0):
+        """Shows the `size` preview of `path` in `image_label` without decoding on the UI thread.
+
+        A cached preview is shown at once. Otherwise the label gets the
+        placeholder and a worker decodes the image; the returned ticket
+        cancels that if the label moves on to another image first.
+        """
+        key = (path, tuple(size), 0)
+        ctk_img = self.image_cache.get(key)
+        if ctk_img is not None:
+            image_label.configure(image=ctk_img)
+            return None
+        image_label.configure(image=self.placeholder_image_small if size == (250, 250) else self.placeholder_image)
+        if not os.path.exists(path):
+            return None
+
+        def show(pil_image):
+            if pil_image is None or not image_label.winfo_exists():
+                return
+            ctk_img = self.image_cache.peek(key)  # The miss was counted when the decode was requested
+            if ctk_img is None:
+                ctk_img = self._make_ctk_image(pil_image)
+                self.image_cache.put(key, ctk_img, self._image_bytes(pil_image))
             image_label.configure(image=ctk_img)
 
-    def _save_images(self, pil_images, bottle_id):
-        if not pil_images:
+        ticket = self.image_loader.request(path, size, show, priority)
+        if self.image_poll_job is None:
+            self.image_poll_job = self.after(15, self._poll_image_loader)
+        return ticket
+
+    def _poll_image_loader(self):
+        self.image_loader.poll(limit=20)
+        if self.image_loader.pending:
+            self.image_poll_job = self.after(15, self._poll_image_loader)
+        else:
+            self.image_poll_job = None
+
+    @staticmethod
+    def _make_ctk_image(pil_image):
+        return ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(pil_image.width, pil_image.height))
+
+    @staticmethod
+    def _image_bytes(pil_image):
+        # The PIL pixels plus the 4-byte-per-pixel Tk photo CTkImage renders from them.
+        return pil_image.width * pil_image.height * (len(pil_image.getbands()) + 4)
+
+    def _on_tk_thread(self, function, *args):
+        """Returns a callback for a worker thread that runs `function(*args)` on the Tk thread."""
+        return lambda: self.after(0, function, *args)
+
+    def _release_images(self, paths):
+        """Deletes those of `paths` in IMAGE_DIR that no entry uses any more.
+
+        Only call this once the entries no longer pointing at `paths` are
+        on disk (see PersistenceWorker.record's `on_written`), so a failed
+        write never leaves the saved collection pointing at deleted files.
+        """
+        for path in set(paths):
+            if self.image_refs.is_used(path):
+                continue
+            if os.path.dirname(os.path.abspath(path)) != os.path.abspath(IMAGE_DIR):
+                continue  # Never delete pictures the collection only points at
+            self._forget_image(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _forget_image(self, path):
+        """Drops every cached preview of an image file that is being rewritten or deleted."""
+        invalidate_thumbnails(path)
+        self.image_cache.invalidate(path)
+
+    def _start_ingest_pool(self):
+        if self.ingest_pool is None:
+            self.ingest_pool = worker_pool(INGEST_WORKERS)
+
+    def ingest_images(self, paths, images, frame):
+        """Imports `paths` on worker processes, appending an ImageHandle of each staged result to `images`.
+
+        Images are appended in selection order as soon as they and every
+        image before them are ready; `frame` shows the per-file progress.
+        Results are dropped if the frame's form is cleared meanwhile.
+        """
+        self._start_ingest_pool()
+        session = next(self.ingest_counter)
+        futures = [self.ingest_pool.submit(ingest_image, path,
+                                           os.path.join(STAGING_DIR, f"{os.getpid()}_{session}_{i}"))
+                   for i, path in enumerate(paths)]
+        generation = frame.ingest_generation
+        frame.ingesting += 1
+        frame._show_ingest_progress(0, len(paths))
+        self.after(20, self._collect_ingested, paths, futures, 0, [], images, frame, generation)
+
+    def _collect_ingested(self, paths, futures, next_index, errors, images, frame, generation):
+        if frame.ingest_generation != generation:
+            for future in futures[next_index:]:
+                future.cancel()
+            return
+        added = False
+        while next_index < len(futures) and futures[next_index].done():
+            try:
+                images.append(ImageHandle(futures[next_index].result()))
+                added = True
+            except Exception as e:
+                errors.append(f"{paths[next_index]}\n{e}")
+            next_index += 1
+        if added:
+            frame._update_image_editor_display()
+        if next_index < len(futures):
+            frame._show_ingest_progress(sum(future.done() for future in futures), len(futures))
+            self.after(20, self._collect_ingested, paths, futures, next_index, errors, images, frame, generation)
+            return
+        frame.ingesting -= 1
+        frame._show_ingest_progress(len(futures), len(futures))
+        if errors:
+            messagebox.showerror("Image Error", "Failed to open image file(s):\n" + "\n".join(errors))
+
+    @traced("save_images", lambda paths, app, handles: {"items": len(paths), "bytes": file_size(*paths)})
+    def _save_images(self, handles):
+        """Stores the editor's images and returns their paths.
+
+        Stored images left untouched keep their path without being read;
+        only imported or edited images are written, and pending edits are
+        applied to the full-resolution image here, once.
+        """
+        if not handles:
             return []
         saved_paths = []
-        for i, pil_image in enumerate(pil_images):
+        for i, handle in enumerate(handles):
+            saved_count = len(saved_paths)
             try:
-                if pil_image.mode in ('RGBA', 'P'):
-                    pil_image = pil_image.convert('RGB')
-                destination_path = os.path.join(IMAGE_DIR, f"{bottle_id}_{i}.png")
-                pil_image.save(destination_path, "PNG")
+                if handle.is_modified:
+                    image = handle.render()
+                    thumbs = [image] * len(THUMB_SIZES)
+                    destination_path = store_image(image)
+                    if is_staged(handle.path):
+                        invalidate_thumbnails(handle.path)
+                        os.remove(handle.path)
+                elif is_staged(handle.path):
+                    # Already decoded, oriented and encoded by the import; just move it.
+                    thumbs = [load_thumbnail(handle.path, size) for size in THUMB_SIZES]
+                    destination_path = store_image_file(handle.path)
+                    invalidate_thumbnails(handle.path)
+                else:
+                    saved_paths.append(handle.path)  # Unchanged and already stored
+                    continue
                 saved_paths.append(destination_path)
+                for size, thumb in zip(THUMB_SIZES, thumbs):
+                    if not os.path.exists(thumbnail_path(destination_path, size)):
+                        make_thumbnail(destination_path, size, source=thumb)
             except Exception as e:
+                if len(saved_paths) == saved_count and not is_staged(handle.path):
+                    # Keep the stored original so releasing the old paths never deletes it.
+                    saved_paths.append(handle.path)
                 messagebox.showerror("Image Save Error", f"Could not save image #{i + 1}: {e}")
         return saved_paths
 
+    # --- Export ---
+    def export_collection(self, export_format, path, frame):
+        """Writes the collection to `path` on a background thread; `frame` shows the progress.
+
+        HTML catalog thumbnails are rendered on the ingest worker processes.
+        """
+        if export_format == "html":
+            self._start_ingest_pool()
+        self._export_queue = queue.Queue()
+        threading.Thread(target=self._export_worker, args=(export_format, path, list(self.bottles_data)),
+                         name="EntryDexExport", daemon=True).start()
+        self.after(50, self._drain_export_queue, frame, path)
+
+    def _export_worker(self, export_format, path, bottles):
+        def progress(done, total):
+            self._export_queue.put(("progress", (done, total)))
+
+        try:
+            if export_format == "html":
+                stats = export_html(bottles, path, pool=self.ingest_pool, progress=progress)
+            else:
+                with open(path, 'w', newline='', encoding='utf-8') as f:
+                    export_entries(bottles, f, export_format, progress)
+                stats = None
+            self._export_queue.put(("done", (len(bottles), stats)))
+        except Exception as e:
+            self._export_queue.put(("error", e))
+
+    def _drain_export_queue(self, frame, path):
+        counts = None
+        while True:
+            try:
+                kind, payload = self._export_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                counts = payload
+                continue
+            frame._show_export_progress(None)
+            if kind == "error":
+                messagebox.showerror("Export Error", f"Could not export the collection:\n{payload}")
+                return
+            total, stats = payload
+            message = f"Exported {total} entries to {path}."
+            if stats and stats["failed"]:
+                message += f"\n{stats['failed']} images could not be read; their entries have no thumbnail."
+            messagebox.showinfo("Export Finished", message)
+            return
+        if counts is not None:
+            frame._show_export_progress(*counts)
+        self.after(50, self._drain_export_queue, frame, path)
+
+    # --- Bulk Import ---
+    def bulk_import(self, path, image_dir, frame):
+        """Reads an import file on a background thread, then adds and saves its entries in one go.
+
+        Images are encoded on the ingest worker processes; `frame` shows
+        the progress and is told when the import is over.
+        """
+        self._start_ingest_pool()
+        self._import_queue = queue.Queue()
+        threading.Thread(target=self._import_worker, args=(path, image_dir),
+                         name="EntryDexImport", daemon=True).start()
+        self.after(50, self._drain_import_queue, frame)
+
+    def _import_worker(self, path, image_dir):
+        try:
+            start = time.perf_counter()
+            result = read_import(path, image_dir=image_dir, pool=self.ingest_pool,
+                                 progress=lambda *counts: self._import_queue.put(("progress", counts)))
+            self._import_queue.put(("done", (result, start)))
+        except Exception as e:
+            self._import_queue.put(("error", e))
+
+    def _drain_import_queue(self, frame):
+        counts = None
+        while True:
+            try:
+                kind, payload = self._import_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                counts = payload
+                continue
+            frame._show_import_progress(None)
+            if kind == "error":
+                messagebox.showerror("Import Error", f"Could not import the file:\n{payload}")
+                return
+            (entries, errors, stats), start = payload
+            if entries:
+                bottles = self.bottles_data.add_block(entries)
+                self.persistence.record_block(self.bottles_data, bottles)
+            seconds = time.perf_counter() - start
+            message = (f"Imported {len(entries)} of {stats['rows']} rows in {seconds:.1f}s "
+                       f"({stats['rows'] / seconds:.0f} rows/s).")
+            if errors:
+                skipped = "\n".join(f"Line {number}: {error}" for number, error in errors[:10])
+                if len(errors) > 10:
+                    skipped += f"\n... and {len(errors) - 10} more"
+                messagebox.showwarning("Import Finished", f"{message}\n\nSkipped:\n{skipped}")
+            else:
+                messagebox.showinfo("Import Finished", message)
+            return
+        if counts is not None:
+            frame._show_import_progress(*counts)
+        self.after(50, self._drain_import_queue, frame)
+
 
 # --- Frame Classes ---
 
@@ -377,7 +1196,12 @@ class AddBottleFrame(BaseFrame):
 
         (self.image_preview, self.counter_label, self.prev_btn, self.next_btn) = self._create_image_editor(container)
 
-        ctk.CTkButton(self, text="Add Entry to Collection", command=self._add_bottle_gui).pack(pady=20)
+        button_frame = ctk.CTkFrame(self, fg_color="transparent")
+        button_frame.pack(pady=20)
+        ctk.CTkButton(button_frame, text="Add Entry to Collection", command=self._add_bottle_gui).pack(side="left", padx=5)
+        self.import_button = ctk.CTkButton(button_frame, text="Import from File...", command=self._import_file)
+        self.import_button.pack(side="left", padx=5)
+        self.import_label = ctk.CTkLabel(self, text="")
 
     def _create_entry_form(self, parent):
         widgets = {}
@@ -413,6 +1237,10 @@ class AddBottleFrame(BaseFrame):
         ctk.CTkButton(controls_frame, text="Add Image(s)", command=self._select_images).pack(side="left", padx=5)
         ctk.CTkButton(controls_frame, text="Remove Current", command=self._remove_current_image).pack(side="left", padx=5)
         ctk.CTkButton(controls_frame, text="Rotate 90°", command=self._rotate_current_image).pack(side="left", padx=5)
+        self.ingest_generation = 0
+        self.ingesting = 0
+        self.ingest_label = ctk.CTkLabel(image_frame, text="")
+        self.ingest_progress = ctk.CTkProgressBar(image_frame)
 
         gallery_nav_frame = ctk.CTkFrame(image_frame, fg_color="transparent")
         gallery_nav_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=5)
@@ -424,8 +1252,20 @@ class AddBottleFrame(BaseFrame):
         next_button.pack(side="right")
         return image_preview_label, counter_label, prev_button, next_button
 
+    def _show_ingest_progress(self, done, total):
+        if done < total:
+            self.ingest_label.configure(text=f"Importing image {done + 1} of {total}...")
+            self.ingest_label.grid(row=3, column=0, pady=(5, 0))
+            self.ingest_progress.set(done / total)
+            self.ingest_progress.grid(row=4, column=0, sticky="ew", padx=20, pady=(0, 10))
+        else:
+            self.ingest_label.grid_remove()
+            self.ingest_progress.grid_remove()
+
     def _add_bottle_gui(self):
-        new_bottle = {"id": generate_id(self.controller.bottles_data)}
+        if not self.controller.ensure_loaded():
+            return
+        new_bottle = {"id": self.controller.bottles_data.next_id()}
         for key, widget in self.widgets.items():
             value = widget.get("1.0", "end-1c").strip() if isinstance(widget, ctk.CTkTextbox) else widget.get().strip()
             new_bottle[key] = value
@@ -433,22 +1273,52 @@ class AddBottleFrame(BaseFrame):
         if not new_bottle.get("name"):
             messagebox.showerror("Input Error", "Name is required.")
             return
+        if self.ingesting:
+            messagebox.showwarning("Images Importing", "Please wait until the selected images are imported.")
+            return
 
-        new_bottle["image_paths"] = self.controller._save_images(self.controller.add_images_pils, new_bottle["id"])
-        self.controller.bottles_data.append(new_bottle)
-        save_data(self.controller.bottles_data)
-        self.controller.view_is_dirty = True
+        new_bottle["image_paths"] = self.controller._save_images(self.controller.add_images)
+        new_bottle = self.controller.bottles_data.add(new_bottle)
+        self.controller.persistence.record(self.controller.bottles_data, 'put', new_bottle)
         messagebox.showinfo("Success", f"Entry '{new_bottle['name']}' added successfully!")
         self.clear_form()
 
+    def _import_file(self):
+        if not self.controller.ensure_loaded():
+            return
+        path = filedialog.askopenfilename(title="Select a CSV or JSON Lines file to import",
+                                          filetypes=(("Entry Files", "*.csv *.jsonl *.json"),
+                                                     ("All files", "*.*")))
+        if not path:
+            return
+        image_dir = filedialog.askdirectory(title="Select the folder with the images (Cancel: the file's folder)",
+                                            initialdir=os.path.dirname(path))
+        self.import_button.configure(state="disabled")
+        self._show_import_progress(0, 0, 0)
+        self.controller.bulk_import(path, image_dir or None, self)
+
+    def _show_import_progress(self, rows, images_done=0, images=0):
+        if rows is None:
+            self.import_label.pack_forget()
+            self.import_button.configure(state="normal")
+            return
+        text = f"Importing... {rows} rows read"
+        if images:
+            text += f", {images_done} of {images} images stored"
+        self.import_label.configure(text=text)
+        self.import_label.pack(pady=(0, 10))
+
     def clear_form(self):
         for widget in self.widgets.values():
             if isinstance(widget, ctk.CTkEntry):
                 widget.delete(0, 'end')
             elif isinstance(widget, ctk.CTkTextbox):
                 widget.delete("1.0", 'end')
-        self.controller.add_images_pils.clear()
+        self.controller.add_images.clear()
         self.controller.add_image_index = 0
+        self.ingest_generation += 1  # Imports still running belong to the cleared form
+        self.ingesting = 0
+        self._show_ingest_progress(0, 0)
         self._update_image_editor_display()
 
     def _select_images(self):
@@ -457,45 +1327,36 @@ class AddBottleFrame(BaseFrame):
                                                        ("All files", "*.*")))
         if not paths:
             return
-        for path in paths:
-            try:
-                self.controller.add_images_pils.append(Image.open(path))
-            except Exception as e:
-                messagebox.showerror("Image Error", f"Failed to open image file: {path}\n{e}")
-        self._update_image_editor_display()
+        self.controller.ingest_images(paths, self.controller.add_images, self)
 
     def _remove_current_image(self):
-        if self.controller.add_images_pils:
-            self.controller.add_images_pils.pop(self.controller.add_image_index)
-            if self.controller.add_image_index >= len(self.controller.add_images_pils):
-                self.controller.add_image_index = max(0, len(self.controller.add_images_pils) - 1)
+        if self.controller.add_images:
+            self.controller.add_images.pop(self.controller.add_image_index)
+            if self.controller.add_image_index >= len(self.controller.add_images):
+                self.controller.add_image_index = max(0, len(self.controller.add_images) - 1)
             self._update_image_editor_display()
 
     def _rotate_current_image(self):
         """Rotate the currently selected image 90° clockwise in Add view."""
-        if not self.controller.add_images_pils:
+        if not self.controller.add_images:
             return
         i = self.controller.add_image_index
-        try:
-            img = self.controller.add_images_pils[i]
-            self.controller.add_images_pils[i] = img.rotate(-90, expand=True)
-            self._update_image_editor_display()
-        except Exception as e:
-            messagebox.showerror("Rotate Error", f"Could not rotate image: {e}")
+        self.controller.add_images[i].rotate(90)
+        self._update_image_editor_display()
 
     def _navigate_images(self, direction):
         new_index = self.controller.add_image_index + direction
-        if 0 <= new_index < len(self.controller.add_images_pils):
+        if 0 <= new_index < len(self.controller.add_images):
             self.controller.add_image_index = new_index
             self._update_image_editor_display()
 
     def _update_image_editor_display(self):
-        pils, index = self.controller.add_images_pils, self.controller.add_image_index
-        if pils:
-            self.controller._update_image_preview(self.image_preview, pil_image=pils[index])
-            self.counter_label.configure(text=f"Image {index + 1} / {len(pils)}")
+        images, index = self.controller.add_images, self.controller.add_image_index
+        if images:
+            self.controller._update_image_preview(self.image_preview, handle=images[index])
+            self.counter_label.configure(text=f"Image {index + 1} / {len(images)}")
             self.prev_btn.configure(state="normal" if index > 0 else "disabled")
-            self.next_btn.configure(state="normal" if index < len(pils) - 1 else "disabled")
+            self.next_btn.configure(state="normal" if index < len(images) - 1 else "disabled")
         else:
             self.controller._update_image_preview(self.image_preview)
             self.counter_label.configure(text="Image 0 / 0")
@@ -507,26 +1368,50 @@ class ViewAllFrame(BaseFrame):
     def __init__(self, parent, controller):
         super().__init__(parent, controller)
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=1)
 
         ctk.CTkLabel(self, text="Full Collection", font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0,
                                                                                                   pady=(20, 10),
                                                                                                   padx=20)
-        self.view_scrollable_frame = ctk.CTkScrollableFrame(self)
-        self.view_scrollable_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
-        self.view_scrollable_frame.grid_columnconfigure(0, weight=1)
-        ctk.CTkButton(self, text="Refresh List", command=self.refresh_view).grid(row=2, column=0, pady=20)
-
+        # Shown only while the collection streams in at startup.
+        self.loading_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.loading_frame.grid_columnconfigure(1, weight=1)
+        self.loading_label = ctk.CTkLabel(self.loading_frame, text="Loading collection...")
+        self.loading_label.grid(row=0, column=0, padx=(0, 10))
+        self.loading_progress = ctk.CTkProgressBar(self.loading_frame)
+        self.loading_progress.grid(row=0, column=1, sticky="ew")
+
+        self.card_list = VirtualCardList(self, controller, empty_text="No entries in the collection.")
+        self.card_list.grid(row=2, column=0, padx=20, pady=10, sticky="nsew")
+        ctk.CTkButton(self, text="Refresh List", command=self.refresh_view).grid(row=3, column=0, pady=20)
+
+    @traced("refresh_view", lambda _, frame: {"items": len(frame.card_list.item_ids)})
     def refresh_view(self):
-        for widget in self.view_scrollable_frame.winfo_children():
-            widget.destroy()
+        self.controller.view_changes.drain()
+        self.card_list.set_items(self.controller.bottles_data.ids_in_order())
+        self.card_list.rebind()
 
-        if not self.controller.bottles_data:
-            ctk.CTkLabel(self.view_scrollable_frame, text="No entries in the collection.").pack(pady=20)
-            return
+    def apply_changes(self, added, modified, removed):
+        """Patches the shown rows for the IDs changed since the last render."""
+        self.card_list.patch_items(added, removed)
+        self.card_list.rebind(modified)
+
+    def begin_loading(self):
+        self.card_list.empty_text = "Loading collection..."
+        self.loading_progress.set(0)
+        self.loading_frame.grid(row=1, column=0, padx=20, sticky="ew")
+        self.refresh_view()
 
-        for bottle in sorted(self.controller.bottles_data, key=lambda x: x.get('id')):
-            EntryCard(self.view_scrollable_frame, bottle, self.controller)
+    def append_entries(self, progress):
+        """Takes in a freshly loaded batch; only the rows on screen get cards."""
+        self.loading_progress.set(progress)
+        self.loading_label.configure(text=f"Loading collection... {len(self.controller.bottles_data)} entries")
+        self.apply_changes(*self.controller.view_changes.drain())
+
+    def end_loading(self):
+        self.loading_frame.grid_forget()
+        self.card_list.empty_text = "No entries in the collection."
+        self.refresh_view()
 
 
 class SearchEditDeleteFrame(BaseFrame):
@@ -544,6 +1429,7 @@ class SearchEditDeleteFrame(BaseFrame):
         self.search_entry = ctk.CTkEntry(search_bar_frame, placeholder_text="Enter keyword, ID, name, color, etc.")
         self.search_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         self.search_entry.bind("<Return>", self._search_bottles_gui)
+        self.search_entry.bind("<KeyRelease>", self._schedule_search)
         ctk.CTkButton(search_bar_frame, text="Search", command=self._search_bottles_gui).grid(row=0, column=3, padx=5,
                                                                                               pady=5)
 
@@ -551,6 +1437,14 @@ class SearchEditDeleteFrame(BaseFrame):
         self.search_results_frame = ctk.CTkScrollableFrame(self, label_text="Search Results")
         self.search_results_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=10, ipady=10)
         self.search_results_frame.grid_columnconfigure(0, weight=1)
+        self.result_buttons = []  # Reused between searches; the first `shown_results` are packed
+        self.shown_results = 0
+        self.results_status_label = ctk.CTkLabel(self.search_results_frame, text="")
+        self.search_job = None
+        self.render_generation = 0
+        self.last_query = None
+        self.last_matches = None
+        self.last_version = None
 
         # Editor Container
         editor_container = ctk.CTkFrame(self, fg_color="transparent")
@@ -588,38 +1482,85 @@ class SearchEditDeleteFrame(BaseFrame):
     def _create_image_editor(self, parent):
         return AddBottleFrame._create_image_editor(self, parent)
 
+    def _show_ingest_progress(self, done, total):
+        AddBottleFrame._show_ingest_progress(self, done, total)
+
+    def _schedule_search(self, event=None):
+        """Runs a live search once typing pauses for SEARCH_DEBOUNCE_MS."""
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DEBOUNCE_MS, self._search_bottles_gui)
+
+    @traced("search", lambda _, frame, event=None: {"items": len(frame.last_matches) if frame.last_matches is not None
+                                                    else len(frame.controller.bottles_data)})
     def _search_bottles_gui(self, event=None):
-        for widget in self.search_results_frame.winfo_children():
-            widget.destroy()
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+            self.search_job = None
 
         query = self.search_entry.get().lower().strip()
-        results = []
 
         # Use in-memory data
         source_data = self.controller.bottles_data
+        unchanged = source_data.version == self.last_version
+        if unchanged and query == self.last_query:
+            return
 
         if not query:
-            results = sorted(source_data, key=lambda x: x.get('id'))
+            matches = None
+            total = len(source_data)
+            results = source_data.in_id_order(SEARCH_RESULT_LIMIT)
         else:
-            for bottle in source_data:
-                is_match = any(query in str(value).lower() for value in bottle.values() if isinstance(value, str))
-                if is_match:
-                    results.append(bottle)
-            results.sort(key=lambda x: x.get('id'))
-
-        if results:
-            for bottle in results:
-                bottle_id = bottle.get('id')
-                display_text = f"{bottle_id}: {bottle.get('name', 'N/A')} ({bottle.get('type', 'N/A')})"
-                btn = ctk.CTkButton(self.search_results_frame, text=display_text, anchor="w",
-                                    command=lambda b_id=bottle_id: self._load_bottle_for_edit(b_id))
-                btn.pack(fill="x", padx=5, pady=2)
-        else:
-            ctk.CTkLabel(self.search_results_frame, text=f"No entries found matching '{query}'.").pack(pady=10)
+            # Extending the previous query can only narrow its matches.
+            within = None
+            if unchanged and self.last_query and self.last_matches is not None and self.last_query in query:
+                within = self.last_matches
+            matches = self.controller.search_index.search(query, within)
+            total = len(matches)
+            results = [source_data.get(bottle_id) for bottle_id in heapq.nsmallest(SEARCH_RESULT_LIMIT, matches)]
+        self.last_query, self.last_matches, self.last_version = query, matches, source_data.version
+        self._render_results(results, total, query)
+
+    def _render_results(self, results, total, query):
+        # Any chunks still queued for an older search see the new generation and stop.
+        self.render_generation += 1
+        self.results_status_label.pack_forget()
+        for button in self.result_buttons[len(results):self.shown_results]:
+            button.pack_forget()
+        self.shown_results = min(self.shown_results, len(results))
+        if not results:
+            self.results_status_label.configure(text=f"No entries found matching '{query}'.")
+            self.results_status_label.pack(pady=10)
+            return
+        self._render_result_chunk(results, total, 0, self.render_generation)
+
+    def _render_result_chunk(self, results, total, start, generation):
+        if generation != self.render_generation:
+            return
+        end = min(start + RESULTS_PER_TICK, len(results))
+        for i in range(start, end):
+            bottle = results[i]
+            bottle_id = bottle.get('id')
+            display_text = f"{bottle_id}: {bottle.get('name', 'N/A')} ({bottle.get('type', 'N/A')})"
+            command = lambda b_id=bottle_id: self._load_bottle_for_edit(b_id)
+            if i < len(self.result_buttons):
+                self.result_buttons[i].configure(text=display_text, command=command)
+            else:
+                self.result_buttons.append(ctk.CTkButton(self.search_results_frame, text=display_text, anchor="w",
+                                                         command=command))
+            if i >= self.shown_results:
+                self.result_buttons[i].pack(fill="x", padx=5, pady=2)
+                self.shown_results = i + 1
+        if end < len(results):
+            self.after(1, self._render_result_chunk, results, total, end, generation)
+        elif total > len(results):
+            self.results_status_label.configure(
+                text=f"Showing the first {len(results)} of {total} entries. Refine the search to see the rest.")
+            self.results_status_label.pack(pady=10)
 
     def _load_bottle_for_edit(self, bottle_id):
         self.clear_form()
-        bottle, _ = find_bottle_by_id(bottle_id, self.controller.bottles_data)
+        bottle = self.controller.bottles_data.get(bottle_id)
         if bottle:
             self.controller.current_edit_bottle_id = bottle_id
             self.scrollable_form._label.configure(text=f"Editing: {bottle.get('name', '')} ({bottle_id})")
@@ -631,13 +1572,9 @@ class SearchEditDeleteFrame(BaseFrame):
                 else:
                     widget.delete(0, "end")
                     widget.insert(0, value)
-            self.controller.edit_images_pils.clear()
-            for path in bottle.get('image_paths', []):
-                if os.path.exists(path):
-                    try:
-                        self.controller.edit_images_pils.append(Image.open(path))
-                    except Exception:
-                        pass
+            self.controller.edit_images.clear()
+            self.controller.edit_images.extend(
+                ImageHandle(path) for path in bottle.get('image_paths', []) if os.path.exists(path))
             self.controller.edit_image_index = 0
             self._update_image_editor_display()
             # Show buttons
@@ -651,21 +1588,27 @@ class SearchEditDeleteFrame(BaseFrame):
         if not bottle_id:
             messagebox.showwarning("No Entry Loaded", "Please search for and load an entry first.")
             return
+        if not self.controller.ensure_loaded():
+            return
 
-        bottle_to_edit, index = find_bottle_by_id(bottle_id, self.controller.bottles_data)
-        if not bottle_to_edit:
+        if bottle_id not in self.controller.bottles_data:
             messagebox.showerror("Error", "Entry to edit not found in database.")
             return
 
+        values = {}
         for key, widget in self.widgets.items():
             value = widget.get("1.0", "end-1c").strip() if isinstance(widget, ctk.CTkTextbox) else widget.get().strip()
-            bottle_to_edit[key] = value
+            values[key] = value
 
-        bottle_to_edit["image_paths"] = self.controller._save_images(self.controller.edit_images_pils,
-                                                                     bottle_to_edit["id"])
-        self.controller.bottles_data[index] = bottle_to_edit
-        save_data(self.controller.bottles_data)
-        self.controller.view_is_dirty = True
+        if self.ingesting:
+            messagebox.showwarning("Images Importing", "Please wait until the selected images are imported.")
+            return
+        old_paths = list(self.controller.bottles_data.get(bottle_id).get("image_paths", []))
+        values["image_paths"] = self.controller._save_images(self.controller.edit_images)
+        bottle_to_edit = self.controller.bottles_data.update(bottle_id, values)
+        self.controller.persistence.record(
+            self.controller.bottles_data, 'put', bottle_to_edit,
+            on_written=self.controller._on_tk_thread(self.controller._release_images, old_paths))
         messagebox.showinfo("Success", f"Entry '{bottle_id}' updated successfully!")
         self.clear_form()
         self._search_bottles_gui()
@@ -675,18 +1618,19 @@ class SearchEditDeleteFrame(BaseFrame):
         if not bottle_id:
             messagebox.showwarning("No Entry Loaded", "Please load an entry to delete.")
             return
+        if not self.controller.ensure_loaded():
+            return
 
-        bottle_to_delete, index = find_bottle_by_id(bottle_id, self.controller.bottles_data)
+        bottle_to_delete = self.controller.bottles_data.get(bottle_id)
         if bottle_to_delete:
             confirm = messagebox.askyesno("Confirm Delete",
                                           f"Are you sure you want to permanently delete '{bottle_to_delete.get('name')}' (ID: {bottle_id})?")
             if confirm:
-                for path in bottle_to_delete.get("image_paths", []):
-                    if os.path.exists(path):
-                        os.remove(path)
-                del self.controller.bottles_data[index]
-                save_data(self.controller.bottles_data)
-                self.controller.view_is_dirty = True
+                self.controller.bottles_data.remove(bottle_id)
+                self.controller.persistence.record(
+                    self.controller.bottles_data, 'delete', bottle_to_delete,
+                    on_written=self.controller._on_tk_thread(self.controller._release_images,
+                                                             bottle_to_delete.get("image_paths", [])))
                 messagebox.showinfo("Success", f"Entry '{bottle_id}' deleted successfully!")
                 self.clear_form()
                 self._search_bottles_gui()
@@ -702,8 +1646,11 @@ class SearchEditDeleteFrame(BaseFrame):
             elif isinstance(widget, ctk.CTkTextbox):
                 widget.delete("1.0", 'end')
 
-        self.controller.edit_images_pils.clear()
+        self.controller.edit_images.clear()
         self.controller.edit_image_index = 0
+        self.ingest_generation += 1  # Imports still running belong to the cleared form
+        self.ingesting = 0
+        self._show_ingest_progress(0, 0)
         self._update_image_editor_display()
 
         # Hide action buttons
@@ -716,45 +1663,36 @@ class SearchEditDeleteFrame(BaseFrame):
                                                        ("All files", "*.*")))
         if not paths:
             return
-        for path in paths:
-            try:
-                self.controller.edit_images_pils.append(Image.open(path))
-            except Exception as e:
-                messagebox.showerror("Image Error", f"Failed to open image file: {path}\n{e}")
-        self._update_image_editor_display()
+        self.controller.ingest_images(paths, self.controller.edit_images, self)
 
     def _remove_current_image(self):
-        if self.controller.edit_images_pils:
-            self.controller.edit_images_pils.pop(self.controller.edit_image_index)
-            if self.controller.edit_image_index >= len(self.controller.edit_images_pils):
-                self.controller.edit_image_index = max(0, len(self.controller.edit_images_pils) - 1)
+        if self.controller.edit_images:
+            self.controller.edit_images.pop(self.controller.edit_image_index)
+            if self.controller.edit_image_index >= len(self.controller.edit_images):
+                self.controller.edit_image_index = max(0, len(self.controller.edit_images) - 1)
             self._update_image_editor_display()
 
     def _rotate_current_image(self):
         """Rotate the currently selected image 90° clockwise in Edit view."""
-        if not self.controller.edit_images_pils:
+        if not self.controller.edit_images:
             return
         i = self.controller.edit_image_index
-        try:
-            img = self.controller.edit_images_pils[i]
-            self.controller.edit_images_pils[i] = img.rotate(-90, expand=True)
-            self._update_image_editor_display()
-        except Exception as e:
-            messagebox.showerror("Rotate Error", f"Could not rotate image: {e}")
+        self.controller.edit_images[i].rotate(90)
+        self._update_image_editor_display()
 
     def _navigate_images(self, direction):
         new_index = self.controller.edit_image_index + direction
-        if 0 <= new_index < len(self.controller.edit_images_pils):
+        if 0 <= new_index < len(self.controller.edit_images):
             self.controller.edit_image_index = new_index
             self._update_image_editor_display()
 
     def _update_image_editor_display(self):
-        pils, index = self.controller.edit_images_pils, self.controller.edit_image_index
-        if pils:
-            self.controller._update_image_preview(self.image_preview, pil_image=pils[index])
-            self.counter_label.configure(text=f"Image {index + 1} / {len(pils)}")
+        images, index = self.controller.edit_images, self.controller.edit_image_index
+        if images:
+            self.controller._update_image_preview(self.image_preview, handle=images[index])
+            self.counter_label.configure(text=f"Image {index + 1} / {len(images)}")
             self.prev_btn.configure(state="normal" if index > 0 else "disabled")
-            self.next_btn.configure(state="normal" if index < len(pils) - 1 else "disabled")
+            self.next_btn.configure(state="normal" if index < len(images) - 1 else "disabled")
         else:
             self.controller._update_image_preview(self.image_preview)
             self.counter_label.configure(text="Image 0 / 0")
@@ -763,6 +1701,8 @@ class SearchEditDeleteFrame(BaseFrame):
 
 
 class ReportsFrame(BaseFrame):
+    EXPORT_FORMATS = {"CSV": "csv", "JSON Lines": "jsonl", "JSON": "json", "HTML Catalog": "html"}
+
     def __init__(self, parent, controller):
         super().__init__(parent, controller)
         self.grid_columnconfigure(0, weight=1)
@@ -782,47 +1722,175 @@ class ReportsFrame(BaseFrame):
             side="left", padx=5)
         ctk.CTkButton(report_buttons_frame, text="List by Condition",
                       command=lambda: self.generate_report("condition")).pack(side="left", padx=5)
-
+        ctk.CTkButton(report_buttons_frame, text="Era by Decade",
+                      command=lambda: self.generate_report("era")).pack(side="left", padx=5)
+        ctk.CTkButton(report_buttons_frame, text="Type × Color",
+                      command=lambda: self.generate_report("type_color")).pack(side="left", padx=5)
+        ctk.CTkButton(report_buttons_frame, text="Locations",
+                      command=lambda: self.generate_report("location")).pack(side="left", padx=5)
+
+        self.text_font = ctk.CTkFont()
+        self.table_font = ctk.CTkFont(family="Courier")  # Keeps the columns of the tables aligned
         self.report_output_textbox = ctk.CTkTextbox(self, wrap="word")
         self.report_output_textbox.grid(row=1, column=0, padx=20, pady=10, sticky="nsew", columnspan=2)
 
+        export_frame = ctk.CTkFrame(self, fg_color="transparent")
+        export_frame.grid(row=2, column=0, columnspan=2, padx=20, pady=(0, 20), sticky="ew")
+        ctk.CTkLabel(export_frame, text="Export collection as:").pack(side="left")
+        self.export_format = ctk.CTkOptionMenu(export_frame, values=list(self.EXPORT_FORMATS))
+        self.export_format.pack(side="left", padx=5)
+        self.export_button = ctk.CTkButton(export_frame, text="Export...", command=self._export)
+        self.export_button.pack(side="left", padx=5)
+        self.export_label = ctk.CTkLabel(export_frame, text="")
+        self.export_progress = ctk.CTkProgressBar(export_frame)
+
+        self.current_report = "type"
+        self.rendered_version = None
+        self.render_generation = 0
+        self.sections = []  # Per collapsible section: its remaining lines and paging state
+
+    def _export(self):
+        if not self.controller.ensure_loaded():
+            return
+        label = self.export_format.get()
+        export_format = self.EXPORT_FORMATS[label]
+        if export_format == "html":
+            path = filedialog.askdirectory(title="Select a folder for the HTML catalog")
+        else:
+            path = filedialog.asksaveasfilename(title="Export Collection", defaultextension=f".{export_format}",
+                                                filetypes=((f"{label} Files", f"*.{export_format}"),
+                                                           ("All files", "*.*")))
+        if not path:
+            return
+        self.export_button.configure(state="disabled")
+        self._show_export_progress(0, len(self.controller.bottles_data))
+        self.controller.export_collection(export_format, path, self)
+
+    def _show_export_progress(self, done, total=0):
+        if done is None:
+            self.export_label.pack_forget()
+            self.export_progress.pack_forget()
+            self.export_button.configure(state="normal")
+            return
+        self.export_label.configure(text=f"{done} of {total} entries exported")
+        self.export_label.pack(side="left", padx=(15, 5))
+        self.export_progress.set(done / total if total else 1.0)
+        self.export_progress.pack(side="left", fill="x", expand=True, padx=5)
+
+    def refresh(self):
+        """Re-renders the current report if the collection changed since it was rendered."""
+        if self.rendered_version != self.controller.bottles_data.version:
+            self.generate_report(self.current_report)
+
+    @traced("generate_report", lambda _, frame, report_type: {"report": report_type})
     def generate_report(self, report_type):
+        """Renders a report: the first screen right away, the rest in chunks from the event loop."""
+        self.current_report = report_type
+        self.rendered_version = self.controller.bottles_data.version
+        self.render_generation += 1
+        self._clear_sections()
+        tabular = report_type in ("era", "type_color")
+        self.report_output_textbox.configure(font=self.table_font if tabular else self.text_font,
+                                             wrap="none" if tabular else "word")
         self.report_output_textbox.delete("1.0", "end")
         if not self.controller.bottles_data:
             self.report_output_textbox.insert("end", "No entries to report on. Collection is empty.")
             return
-
-        output_text = ""
-        if report_type in ("type", "color"):
-            counts = {}
-            for bottle in self.controller.bottles_data:
-                item = bottle.get(report_type, 'Unknown').strip().title()
-                if not item:
-                    item = 'Unknown'
-                counts[item] = counts.get(item, 0) + 1
-            output_text += f"--- Entries by {report_type.title()} ---\n\n"
-            for item, count in sorted(counts.items()):
-                output_text += f"{item}: {count}\n"
-        elif report_type == "condition":
-            groups = {}
-            for bottle in self.controller.bottles_data:
-                item = bottle.get('condition', 'Unknown').strip().title()
-                if not item:
-                    item = 'Unknown'
-                if item not in groups:
-                    groups[item] = []
-                groups[item].append(f"{bottle.get('name', 'Unnamed')} (ID: {bottle.get('id')})")
-            output_text += "--- Entries by Condition ---\n"
-            for item, names in sorted(groups.items()):
-                output_text += f"\n{item}:\n"
-                for name in sorted(names):
-                    output_text += f"  - {name}\n"
-
-        self.report_output_textbox.insert("end", output_text)
-
-
-if __name__ == "__main__":
+        items = iter_report(report_type, self.controller.bottles_data, self.controller.report_aggregates,
+                            self.controller.analytics)
+        self._render_report_chunk(items, self.render_generation)
+
+    def _render_report_chunk(self, items, generation):
+        if generation != self.render_generation:
+            return  # A newer report replaced this one
+        textbox = self.report_output_textbox
+        lines = []
+        budget = REPORT_LINES_PER_TICK
+        for item in items:
+            if isinstance(item, str):
+                lines.append(item)
+                budget -= 1
+            else:
+                if lines:
+                    textbox.insert("end", "\n".join(lines) + "\n")
+                    lines = []
+                budget -= self._insert_section(*item)
+            if budget <= 0:
+                break
+        else:
+            items = None
+        if lines:
+            textbox.insert("end", "\n".join(lines) + "\n")
+        if items is not None:
+            self.after(1, self._render_report_chunk, items, generation)
+
+    def _insert_section(self, title, total, lines):
+        """Adds a collapsible section showing the first page of `lines`. Returns the number of lines inserted."""
+        textbox = self.report_output_textbox
+        number = len(self.sections)
+        header, body, more = f"header{number}", f"body{number}", f"more{number}"
+        self.sections.append({"lines": lines, "total": total, "shown": 0, "collapsed": False})
+        textbox.insert("end", "\n")
+        textbox.insert("end", "▾", (header, f"arrow{number}"))
+        textbox.insert("end", f" {title}\n", header)
+        textbox.tag_config(header, foreground="#3399FF")
+        textbox.tag_bind(header, "<Button-1>", lambda event: self._toggle_section(number))
+        textbox.tag_config(more, foreground="#3399FF")
+        textbox.tag_bind(more, "<Button-1>", lambda event: self._show_more(number))
+        for tag in (header, more):
+            textbox.tag_bind(tag, "<Enter>", lambda event: textbox.configure(cursor="hand2"))
+            textbox.tag_bind(tag, "<Leave>", lambda event: textbox.configure(cursor=""))
+        # Pages are inserted at this mark; it moves past whatever is inserted at it.
+        textbox.mark_set(body, "end-1c")
+        textbox.mark_gravity(body, "right")
+        return 1 + self._insert_page(number)
+
+    def _insert_page(self, number):
+        """Inserts the next page of a section at its mark, followed by a "show more" line if lines remain."""
+        textbox = self.report_output_textbox
+        section = self.sections[number]
+        body, more = f"body{number}", f"more{number}"
+        page = list(itertools.islice(section["lines"], REPORT_PAGE_LINES))
+        section["shown"] += len(page)
+        remaining = section["total"] - section["shown"]
+        if page:
+            textbox.insert(body, "\n".join(page) + "\n", body)
+        if remaining > 0:
+            textbox.insert(body, f"  ... show {min(remaining, REPORT_PAGE_LINES)} more of {remaining} remaining\n",
+                           (body, more))
+            # Back before the "show more" line, where the next page goes.
+            textbox.mark_set(body, textbox.tag_ranges(more)[0])
+        return len(page)
+
+    def _clear_sections(self):
+        textbox = self.report_output_textbox
+        for number in range(len(self.sections)):
+            textbox.tag_delete(f"header{number}", f"arrow{number}", f"body{number}", f"more{number}")
+            textbox.mark_unset(f"body{number}")
+        self.sections = []
+
+    def _show_more(self, number):
+        ranges = self.report_output_textbox.tag_ranges(f"more{number}")
+        if ranges:
+            self.report_output_textbox.delete(ranges[0], ranges[1])
+        self._insert_page(number)
+
+    def _toggle_section(self, number):
+        section = self.sections[number]
+        section["collapsed"] = not section["collapsed"]
+        textbox = self.report_output_textbox
+        textbox.tag_config(f"body{number}", elide=section["collapsed"])
+        start, end = textbox.tag_ranges(f"arrow{number}")[:2]
+        textbox.delete(start, end)
+        textbox.insert(start, "▸" if section["collapsed"] else "▾", (f"header{number}", f"arrow{number}"))
+
+
+def main():
     ctk.set_appearance_mode("System")
     ctk.set_default_color_theme("blue")
     app = EntryDexApp()
     app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
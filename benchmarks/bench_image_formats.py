@@ -0,0 +1,70 @@
+"""Compares image storage profiles by file size, encode time and decode time.
+
+Usage: python benchmarks/bench_image_formats.py [image ...]
+
+Without arguments it uses synthetic 4000x3000 photos; pass real pictures
+of bottles for numbers that mean something for your collection.
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageFilter  # noqa: E402
+
+from entrydex_core import encode_image  # noqa: E402
+
+PROFILES = {
+    "PNG, full size (old)": {"format": "PNG", "quality": 0, "max_edge": 0, "strip_metadata": True},
+    "PNG, 2048px": {"format": "PNG", "quality": 0, "max_edge": 2048, "strip_metadata": True},
+    "JPEG q90, 2048px": {"format": "JPEG", "quality": 90, "max_edge": 2048, "strip_metadata": True},
+    "JPEG q80, 1600px": {"format": "JPEG", "quality": 80, "max_edge": 1600, "strip_metadata": True},
+    "WebP q85, 2048px": {"format": "WEBP", "quality": 85, "max_edge": 2048, "strip_metadata": True},
+}
+
+
+def synthetic_photo(seed):
+    """A photo-like image: smooth shapes plus sensor noise, which compresses like a real picture."""
+    base = Image.effect_mandelbrot((4000, 3000), (-2.2 + seed * 0.1, -1.2, 1.0, 1.2), 60).convert('RGB')
+    base = base.filter(ImageFilter.GaussianBlur(6))
+    noise = Image.effect_noise((4000, 3000), 12).convert('RGB')
+    return Image.blend(base, noise, 0.15)
+
+
+def main(paths):
+    if paths:
+        images = [Image.open(path).convert('RGB') for path in paths]
+    else:
+        images = [synthetic_photo(seed) for seed in range(3)]
+    print(f"{len(images)} images\n")
+    print(f"{'profile':>22} {'KB/image':>9} {'encode':>9} {'decode':>9} {'thumbnail':>10}")
+    for name, profile in PROFILES.items():
+        size = encode_time = decode_time = thumb_time = 0.0
+        for image in images:
+            buffer = io.BytesIO()
+            start = time.perf_counter()
+            encode_image(image, buffer, profile)
+            encode_time += time.perf_counter() - start
+            size += buffer.tell()
+
+            buffer.seek(0)
+            start = time.perf_counter()
+            with Image.open(buffer) as decoded:
+                decoded.load()
+            decode_time += time.perf_counter() - start
+
+            buffer.seek(0)
+            start = time.perf_counter()
+            with Image.open(buffer) as decoded:
+                decoded.draft('RGB', (250, 250))
+                decoded.thumbnail((250, 250), Image.Resampling.LANCZOS)
+            thumb_time += time.perf_counter() - start
+        count = len(images)
+        print(f"{name:>22} {size / count / 1024:>9.0f} {encode_time / count * 1000:>7.0f}ms "
+              f"{decode_time / count * 1000:>7.0f}ms {thumb_time / count * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,79 @@
+"""Compares memory and scan time of compact Bottle records against plain dicts.
+
+Usage: python benchmarks/bench_memory.py [count ...]
+"""
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entrydex_core import Bottle  # noqa: E402
+from synthetic import make_collection  # noqa: E402
+
+
+def measure(build):
+    """Returns (records, bytes still allocated once `build` has finished)."""
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, size
+
+
+def scan_field(records):
+    counts = {}
+    for bottle in records:
+        item = bottle.get('type', 'Unknown')
+        counts[item] = counts.get(item, 0) + 1
+    return counts
+
+
+def scan_values(records):
+    """The full-text search's pattern: every string value of every entry."""
+    return sum(1 for bottle in records
+               if any('co' in value.lower() for value in bottle.values() if isinstance(value, str)))
+
+
+def time_scan(records, scan, repeat=5):
+    """Runs `scan` once to warm up, then `repeat` times; returns the best and median seconds."""
+    scan(records)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scan(records)
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def format_scan(timing):
+    best, median = timing
+    return f"{best * 1000:.1f}/{median * 1000:.1f}ms"
+
+
+def main(counts):
+    print("Scan times are the best/median of several runs after a warm-up.")
+    print(f"{'entries':>8} {'dict B/entry':>13} {'Bottle B/entry':>15} {'saving':>7} {'dict get':>15} "
+          f"{'Bottle get':>15} {'dict values':>15} {'Bottle values':>15}")
+    for count in counts:
+        text = json.dumps(make_collection(count))
+        dicts, dict_size = measure(lambda: json.loads(text))
+        dict_scans = [time_scan(dicts, scan) for scan in (scan_field, scan_values)]
+        del dicts
+        bottles, bottle_size = measure(lambda: [Bottle(item) for item in json.loads(text)])
+        bottle_scans = [time_scan(bottles, scan) for scan in (scan_field, scan_values)]
+        del bottles
+        print(f"{count:>8} {dict_size / count:>13.0f} {bottle_size / count:>15.0f} "
+              f"{1 - bottle_size / dict_size:>7.0%} {format_scan(dict_scans[0]):>15} "
+              f"{format_scan(bottle_scans[0]):>15} {format_scan(dict_scans[1]):>15} "
+              f"{format_scan(bottle_scans[1]):>15}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
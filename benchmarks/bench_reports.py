@@ -0,0 +1,79 @@
+"""Compares the columnar analytics reports against loops over the entry dicts.
+
+Usage: python benchmarks/bench_reports.py [count ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import entrydex_core  # noqa: E402
+from entrydex_core import BottleCollection, CollectionColumns, parse_era  # noqa: E402
+from synthetic import make_collection  # noqa: E402
+
+
+def loop_counts(bottles, key):
+    """The counting loop generate_report used before the aggregates."""
+    counts = {}
+    for bottle in bottles:
+        item = bottle.get(key, 'Unknown').strip().title()
+        if not item:
+            item = 'Unknown'
+        counts[item] = counts.get(item, 0) + 1
+    return counts
+
+
+def loop_cross_tab(bottles):
+    table = {}
+    for bottle in bottles:
+        cell = (bottle.get('type', 'Unknown').strip().title() or 'Unknown',
+                bottle.get('color', 'Unknown').strip().title() or 'Unknown')
+        table[cell] = table.get(cell, 0) + 1
+    return table
+
+
+def loop_era_histogram(bottles):
+    decades = {}
+    for bottle in bottles:
+        entrydex_core._eras.clear()  # A dict loop re-parses every era on every run
+        era = parse_era(bottle.get('era', ''))
+        if era:
+            for decade in range(era[0] // 10 * 10, era[1] // 10 * 10 + 1, 10):
+                decades[decade] = decades.get(decade, 0) + 1
+    return decades
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(counts):
+    reports = [
+        ("count by type", lambda bottles: loop_counts(bottles, 'type'), lambda columns: columns.counts('type')),
+        ("type x color", loop_cross_tab, lambda columns: columns.cross_tab('type', 'color')),
+        ("era histogram", loop_era_histogram, lambda columns: columns.era_histogram()),
+        ("locations", lambda bottles: loop_counts(bottles, 'location'), lambda columns: columns.location_summary()),
+    ]
+    numpy = entrydex_core._numpy()
+    for count in counts:
+        collection = BottleCollection(make_collection(count))
+        start = time.perf_counter()
+        columns = CollectionColumns()
+        collection.add_observer(columns)
+        build = time.perf_counter() - start
+        print(f"\n{count} entries (columns built in {build * 1000:.0f}ms)")
+        print(f"{'report':>15} {'dict loop':>10} {'columns':>10} {'NumPy':>10}")
+        for name, loop, report in reports:
+            loop_time = timed(loop, collection)
+            entrydex_core._np = None
+            column_time = timed(report, columns)
+            entrydex_core._np = numpy
+            numpy_time = timed(report, columns) if numpy is not None else float('nan')
+            print(f"{name:>15} {loop_time:>8.1f}ms {column_time:>8.1f}ms {numpy_time:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,46 @@
+"""Compares SearchIndex queries against the old full substring scan.
+
+Usage: python benchmarks/bench_search.py [count ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entrydex_core import BottleCollection, SearchIndex  # noqa: E402
+from synthetic import make_collection  # noqa: E402
+
+QUERIES = ["soda", "amber", "btl0042", "boston", "hutchinson stopper", "co", "a", "1890", "xyz", "s & c"]
+
+
+def scan(bottles, query):
+    """The matching loop _search_bottles_gui used before the index."""
+    return {bottle['id'] for bottle in bottles
+            if any(query in str(value).lower() for value in bottle.values() if isinstance(value, str))}
+
+
+def main(counts):
+    for count in counts:
+        collection = BottleCollection(make_collection(count))
+        start = time.perf_counter()
+        index = SearchIndex()
+        collection.add_observer(index)
+        index.index_pending()
+        build = time.perf_counter() - start
+        print(f"\n{count} entries (index built in {build * 1000:.0f}ms)")
+        print(f"{'query':>20} {'matches':>8} {'scan':>10} {'index':>10} {'speedup':>8}")
+        for query in QUERIES:
+            start = time.perf_counter()
+            expected = scan(collection, query)
+            scan_time = time.perf_counter() - start
+            start = time.perf_counter()
+            found = index.search(query)
+            index_time = time.perf_counter() - start
+            assert found == expected, query
+            print(f"{query!r:>20} {len(found):>8} {scan_time * 1000:>8.1f}ms {index_time * 1000:>8.2f}ms "
+                  f"{scan_time / max(index_time, 1e-9):>7.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
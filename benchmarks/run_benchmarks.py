@@ -0,0 +1,228 @@
+"""Times the main operations of EntryDex on synthetic collections and saves the results as JSON.
+
+Usage: python benchmarks/run_benchmarks.py [--sizes 1000,10000,100000] [--images N]
+                                           [--output FILE] [--compare BASELINE.json] [--threshold 1.25]
+
+Each size gets a fresh collection written to a temporary folder. The
+timings (best and median of several runs, in milliseconds) are saved to
+benchmarks/results/ unless --output says otherwise. With --compare, every
+timing is set against the baseline file, and the exit status is 1 if any
+got slower by more than --threshold, so a run can guard against
+regressions.
+"""
+import argparse
+import bisect
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import entrydex_core as core  # noqa: E402
+from synthetic import write_catalog  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+QUERIES = ["soda", "amber", "btl0042", "boston", "hutchinson stopper", "co", "a", "1890", "xyz", "s & c"]
+REPORT_TYPES = ("type", "color", "condition", "era", "type_color", "location")
+LOOKUPS = 1000  # IDs generated or looked up per timed run
+NOISE_FLOOR_MS = 0.05  # Timings below this are too small to call a regression
+
+
+def measure(function, budget=1.0, max_runs=20):
+    """Runs `function` until `budget` seconds are used (at least once); returns its best and median ms."""
+    times = []
+    deadline = time.perf_counter() + budget
+    while not times or (len(times) < max_runs and time.perf_counter() < deadline):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"best_ms": round(min(times), 4), "median_ms": round(statistics.median(times), 4), "runs": len(times)}
+
+
+def consume_report(report_type, bottles, aggregates, analytics):
+    """Renders a whole report to lines, the way the Reports page and the CLI consume it."""
+    lines = 0
+    for item in core.iter_report(report_type, bottles, aggregates, analytics):
+        if isinstance(item, str):
+            lines += 1
+        else:
+            lines += 1 + sum(1 for _ in item[2])
+    return lines
+
+
+def patch_view(ids, added, removed):
+    """The ID-list patching ViewAllFrame.apply_changes does before rebinding the cards."""
+    item_ids = list(ids)
+    for bottle_id in removed:
+        i = bisect.bisect_left(item_ids, bottle_id)
+        if i < len(item_ids) and item_ids[i] == bottle_id:
+            del item_ids[i]
+    for bottle_id in added:
+        bisect.insort(item_ids, bottle_id)
+    return item_ids
+
+
+def build_index(data):
+    """Indexes `data` completely, as the app does in the background after loading."""
+    index = core.SearchIndex()
+    core.BottleCollection(data).add_observer(index)
+    index.index_pending()
+
+
+def bench_size(count, images):
+    """Returns {operation: timing} for a fresh collection of `count` entries."""
+    results = {}
+    rng = random.Random(count)
+    write_catalog(count, images)
+    core._storage = None  # Every size starts with a fresh backend
+
+    results["load_data"] = measure(core.load_data)
+    data = core.load_data()
+    results["save_data"] = measure(lambda: core.save_data(data), max_runs=5)
+    storage = core.get_storage()
+    results["save_one (journal)"] = measure(lambda: storage.write_changes([('put', data[0])]))
+    os.remove(core.JOURNAL_FILE)
+
+    def build():
+        collection = core.BottleCollection()
+        for observer in (core.SearchIndex(), core.ChangeTracker(), core.ImageRefs(),
+                         core.ReportAggregates(), core.CollectionColumns()):
+            collection.add_observer(observer)
+        collection.extend(data)
+    results["build_collection"] = measure(build, max_runs=5)
+
+    collection = core.BottleCollection(data)
+    results["generate_id (list scan)"] = measure(lambda: core.generate_id(data))
+    results[f"generate_id x{LOOKUPS}"] = measure(lambda: [core.generate_id(collection) for _ in range(LOOKUPS)])
+    ids = [rng.choice(data)["id"] for _ in range(LOOKUPS)]
+    results[f"find_bottle_by_id x{LOOKUPS}"] = measure(
+        lambda: [core.find_bottle_by_id(bottle_id, collection) for bottle_id in ids])
+
+    index = core.SearchIndex()
+    collection.add_observer(index)
+    results["search index build"] = measure(lambda: build_index(data), max_runs=5)
+    index.index_pending()
+    results[f"search (index, {len(QUERIES)} queries)"] = measure(lambda: [index.search(q) for q in QUERIES])
+    results[f"search (scan, {len(QUERIES)} queries)"] = measure(
+        lambda: [core.search_bottles(collection, q) for q in QUERIES])
+
+    aggregates, analytics = core.ReportAggregates(), core.CollectionColumns()
+    collection.add_observer(aggregates)
+    collection.add_observer(analytics)
+    for report_type in REPORT_TYPES:
+        results[f"report {report_type}"] = measure(
+            lambda: consume_report(report_type, collection, aggregates, analytics))
+
+    sorted_ids = collection.ids_in_order()
+    added = [f"BTL{count + 1 + i:03d}" for i in range(100)]
+    removed = rng.sample(sorted_ids, 100)
+    results["view refresh (ids_in_order)"] = measure(collection.ids_in_order)
+    results["view patch (100 adds, 100 deletes)"] = measure(lambda: patch_view(sorted_ids, added, removed))
+
+    if images:
+        path = data[0]["image_paths"][0]
+        size = core.THUMB_SIZES[1]
+
+        def cold_preview():
+            core.invalidate_thumbnails(path)
+            core.load_thumbnail(path, size)
+        results["image preview (cold)"] = measure(cold_preview)
+        results["image preview (cached)"] = measure(lambda: core.load_thumbnail(path, size))
+        results["image preview (cached, rotated)"] = measure(
+            lambda: core.load_thumbnail(path, size).rotate(-90, expand=True))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Prints each timing against `baseline`; returns the number of regressions beyond `threshold`."""
+    regressions = 0
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} from {baseline.get('created', '?')}:")
+    for size, timings in results["sizes"].items():
+        old_timings = baseline.get("sizes", {}).get(size)
+        if not old_timings:
+            continue
+        print(f"\n{size} entries")
+        print(f"{'operation':>36} {'baseline':>13} {'now':>13} {'ratio':>7}")
+        for name, timing in timings.items():
+            old = old_timings.get(name)
+            if old is None:
+                continue
+            ratio = timing["best_ms"] / old["best_ms"] if old["best_ms"] else 1.0
+            median_ratio = timing["median_ms"] / old["median_ms"] if old["median_ms"] else 1.0
+            flag = ""
+            # Both the best and the median run must be slower, which filters out most one-off noise.
+            if (ratio > threshold and median_ratio > threshold and
+                    timing["best_ms"] - old["best_ms"] > NOISE_FLOOR_MS):
+                flag = "  <-- slower"
+                regressions += 1
+            print(f"{name:>36} {old['best_ms']:>11.3f}ms {timing['best_ms']:>11.3f}ms {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark EntryDex on synthetic collections.")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated collection sizes (default: 1000,10000,100000)")
+    parser.add_argument("--images", type=int, default=20, help="entries per collection with a photo (default: 20)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<date>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio counted as a regression (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": core._numpy() is not None,
+        "sizes": {},
+    }
+    start_dir = os.getcwd()
+    for count in (int(size) for size in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory(prefix="entrydex-bench-") as directory:
+            os.chdir(directory)
+            try:
+                print(f"\n{count} entries")
+                timings = bench_size(count, min(args.images, count))
+            finally:
+                os.chdir(start_dir)
+        for name, timing in timings.items():
+            print(f"{name:>36} {timing['best_ms']:>11.3f}ms (median {timing['median_ms']:.3f}ms)")
+        results["sizes"][str(count)] = timings
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'unknown'}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n{regressions} regressions beyond {args.threshold:.2f}x" if regressions else "\nNo regressions.")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
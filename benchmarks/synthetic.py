@@ -0,0 +1,108 @@
+"""Synthetic bottle collections for the benchmarks.
+
+Usage: python benchmarks/synthetic.py COUNT [--images N] [--seed SEED] [-C DIR]
+
+Writes a bottles.json of COUNT entries (and N generated photos in images/)
+to DIR, by default the current folder, for trying the app on a large
+collection.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TYPES = ["Soda", "Beer", "Medicine", "Bitters", "Whiskey", "Milk", "Ink", "Poison", "Fruit Jar", "Perfume",
+         "Mineral Water", "Patent Medicine", "Food", "Flask", "Cosmetic"]
+COLORS = ["Aqua", "Clear", "Amber", "Cobalt Blue", "Emerald Green", "Olive Green", "Sun Colored Amethyst",
+          "Black Glass", "Milk Glass", "Teal", "Yellow Amber", "Citron"]
+CONDITIONS = ["Mint", "Near Mint", "Excellent", "Very Good", "Good", "Fair", "Chipped", "Cracked", "Stained"]
+ERAS = ["1840-1860", "1860-1880", "1880-1900", "1890s", "c. 1890s", "1900-1910", "1910s", "1920-1930",
+        "Pre-Prohibition", "c. 1875", "Late 1800s", "1930s", "1850s", "1900-1920"]
+CLOSURES = ["Cork", "Crown Cap", "Hutchinson Stopper", "Lightning Stopper", "Codd Marble", "Screw Cap",
+            "Ground Glass Stopper"]
+FINISHES = ["Tooled", "Applied", "Blob Top", "Crown", "Sheared", "Double Ring", "Oil Finish"]
+CITIES = ["Boston", "Philadelphia", "San Francisco", "Baltimore", "Chicago", "St. Louis", "New York",
+          "Cincinnati", "Denver", "Portland", "Louisville", "Albany"]
+WORDS = ["Bros", "Company", "Bottling", "Works", "Pharmacy", "Druggist", "Dairy", "Brewing", "Mineral",
+         "Spring", "Soda", "Water", "Tonic", "Cure", "Remedy", "Extract", "Sarsaparilla", "Ginger", "Ale",
+         "Bitters", "Liniment", "Balsam", "Syrup", "Elixir", "Union", "Eagle", "Star", "Crown", "Pioneer"]
+SURNAMES = ["Smith", "Johnson", "Hires", "Warner", "Hostetter", "Kennedy", "Lyon", "Drake", "Schaefer",
+            "Anheuser", "Coca", "Pepper", "Owens", "Whitney", "Hutchinson", "Mason", "Ball", "Kerr"]
+LOCATIONS = ["Shelf A{}", "Shelf B{}", "Cabinet {}", "Window Sill {}", "Box {}", "Display Case {}"]
+
+
+def make_bottle(num, rng):
+    """Returns one realistic-looking entry with ID 'BTL{num:03d}'."""
+    surname = rng.choice(SURNAMES)
+    city = rng.choice(CITIES)
+    name = f"{surname} {' '.join(rng.sample(WORDS, 2))}"
+    embossing = f"{surname.upper()} & CO / {city.upper()} / {rng.choice(WORDS).upper()}"
+    return {
+        "id": f"BTL{num:03d}",
+        "name": name,
+        "type": rng.choice(TYPES),
+        "color": rng.choice(COLORS),
+        "era": rng.choice(ERAS),
+        "condition": rng.choice(CONDITIONS),
+        "embossing": embossing,
+        "closure_type": rng.choice(CLOSURES),
+        "finish_type": rng.choice(FINISHES),
+        "base_markings": rng.choice(["", "", "A.B.CO.", "W.T.& CO.", "C&CO", f"{rng.randint(1, 99)}"]),
+        "location": rng.choice(LOCATIONS).format(rng.randint(1, 40)),
+        "addresses": f"{rng.randint(10, 999)} {rng.choice(WORDS)} St, {city}" if rng.random() < 0.4 else "",
+        "links": f"https://example.com/bottles/{num}" if rng.random() < 0.2 else "",
+        "image_paths": [],
+    }
+
+
+def make_collection(count, seed=1234):
+    """Returns `count` entries with IDs BTL001 upwards, reproducible for a given seed."""
+    rng = random.Random(seed)
+    return [make_bottle(num, rng) for num in range(1, count + 1)]
+
+
+def make_photo(rng, size=(1200, 900)):
+    """A photo-like picture: a colored gradient with some noise, so it compresses like a real one."""
+    from PIL import Image
+
+    base = Image.linear_gradient('L').resize(size).rotate(rng.uniform(0, 360))
+    factors = [rng.uniform(0.3, 1.0) for _ in range(3)]
+    color = Image.merge('RGB', [base.point(lambda v, k=k: int(v * k)) for k in factors])
+    noise = Image.effect_noise(size, 30).convert('RGB')
+    return Image.blend(color, noise, 0.2)
+
+
+def add_images(bottles, count, seed=1234):
+    """Gives the first `count` entries a generated photo each, stored in IMAGE_DIR like the app stores them."""
+    from entrydex_core import IMAGE_DIR, store_image
+
+    rng = random.Random(seed)
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    for bottle in bottles[:count]:
+        bottle["image_paths"] = [store_image(make_photo(rng))]
+
+
+def write_catalog(count, images=0, seed=1234):
+    """Writes `count` entries, `images` of them with a photo, as the collection in the current folder."""
+    from entrydex_core import write_json_snapshot
+
+    bottles = make_collection(count, seed)
+    if images:
+        add_images(bottles, images, seed)
+    write_json_snapshot(bottles)
+    return bottles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic EntryDex collection.")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--images", type=int, default=0, help="entries to give a generated photo (default: 0)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("-C", "--directory", default=".", help="folder to write the collection to")
+    args = parser.parse_args()
+    os.makedirs(args.directory, exist_ok=True)
+    os.chdir(args.directory)
+    write_catalog(args.count, args.images, args.seed)
+    print(f"Wrote {args.count} entries ({args.images} with images) to {os.getcwd()}")
@@ -0,0 +1,185 @@
+"""Command-line access to an EntryDex collection, for scripts, cron jobs and headless servers.
+
+    python entrydex_cli.py search QUERY [--limit N] [--json]
+    python entrydex_cli.py report {type,color,condition,era,type_color,location}
+    python entrydex_cli.py export [--format json|jsonl|csv|html] [--output PATH]
+    python entrydex_cli.py import FILE [--images DIR] [--map COLUMN=FIELD ...]
+    python entrydex_cli.py reencode-images
+
+Put -C DIR before the command to work on the collection in DIR. Without
+a command the app is started. Only entrydex_core is imported otherwise,
+so commands start without loading any GUI toolkit.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+import entrydex_core as core
+
+REPORT_TYPES = ("type", "color", "condition", "era", "type_color", "location")
+
+
+def load_collection(*observers):
+    """Loads the collection with `observers` attached before the entries arrive."""
+    collection = core.BottleCollection()
+    for observer in observers:
+        collection.add_observer(observer)
+    collection.extend(core.get_storage().load())
+    return collection
+
+
+def save_changes(collection, changes):
+    """Writes `changes` ((op, bottle) pairs) the cheapest way the storage backend allows."""
+    storage = core.get_storage()
+    if storage.supports_changes:
+        storage.write_changes(changes)
+    if not storage.supports_changes or storage.wants_snapshot():
+        storage.save_all(collection.to_list())
+    storage.close()
+
+
+def cmd_search(args):
+    matches = core.search_bottles(load_collection().in_id_order(), args.query)
+    for bottle in matches[:args.limit]:
+        if args.json:
+            print(json.dumps(dict(bottle)))
+        else:
+            print(f"{bottle.get('id')}\t{bottle.get('name', '')}")
+    if len(matches) > args.limit:
+        print(f"... {len(matches) - args.limit} more; raise --limit to see them", file=sys.stderr)
+    return 0 if matches else 1
+
+
+def cmd_report(args):
+    aggregates, analytics = core.ReportAggregates(), core.CollectionColumns()
+    collection = load_collection(aggregates, analytics)
+    if not collection:
+        print("No entries to report on. Collection is empty.")
+        return 0
+    for item in core.iter_report(args.report_type, collection, aggregates, analytics):
+        if isinstance(item, str):
+            print(item)
+        else:
+            title, _, lines = item
+            print(f"\n{title}")
+            for line in lines:
+                print(line)
+    return 0
+
+
+def print_export_progress(done, total):
+    print(f"\r{done}/{total} entries exported", end="", file=sys.stderr, flush=True)
+
+
+def cmd_export(args):
+    bottles = list(load_collection())  # In the order they are stored
+    progress = print_export_progress if args.output and sys.stderr.isatty() else None
+    if args.format == 'html':
+        if not args.output:
+            print("An HTML catalog needs --output, the folder to write it to.", file=sys.stderr)
+            return 2
+        stats = core.export_html(bottles, args.output, progress=progress)
+        if progress:
+            print(file=sys.stderr)
+        print(f"Wrote {stats['pages']} pages and {stats['thumbnails']} thumbnails to {args.output}.")
+        if stats['failed']:
+            print(f"{stats['failed']} images could not be read; their entries have no thumbnail.", file=sys.stderr)
+        return 0
+    if args.output:
+        output = open(args.output, 'w', newline='', encoding='utf-8')
+    else:
+        output = contextlib.nullcontext(sys.stdout)
+    with output as f:
+        core.export_entries(bottles, f, args.format, progress)
+        if args.format == 'json':
+            f.write("\n")
+    if progress:
+        print(file=sys.stderr)
+    return 0
+
+
+def print_import_progress(rows, images_done, images):
+    print(f"\r{rows} rows read, {images_done}/{images} images stored", end="", file=sys.stderr, flush=True)
+
+
+def cmd_import(args):
+    mapping = {}
+    for item in args.map:
+        column, _, key = item.partition("=")
+        mapping[column] = key or None
+    progress = print_import_progress if sys.stderr.isatty() else None
+    collection = load_collection()
+    start = time.perf_counter()  # The rate covers the import itself, not loading the collection
+    try:
+        entries, errors, stats = core.read_import(args.file, mapping, args.images, progress=progress)
+    except (OSError, ValueError) as e:
+        print(f"Cannot import {args.file}: {e}", file=sys.stderr)
+        return 2
+    if progress:
+        print(file=sys.stderr)
+    for number, message in errors:
+        print(f"Skipped line {number}: {message}", file=sys.stderr)
+    if entries:
+        bottles = collection.add_block(entries)
+        save_changes(collection, [('put', dict(bottle)) for bottle in bottles])
+    seconds = time.perf_counter() - start
+    print(f"Imported {len(entries)} of {stats['rows']} rows ({stats['images']} images) in {seconds:.1f}s, "
+          f"{stats['rows'] / seconds:.0f} rows/s.")
+    return 1 if errors else 0
+
+
+def cmd_reencode_images(args):
+    core.reencode_images()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="entrydex", description="Work with an EntryDex collection.")
+    parser.add_argument("-C", "--directory", help="folder holding the collection (default: current folder)")
+    commands = parser.add_subparsers(dest="command")
+
+    search = commands.add_parser("search", help="list the entries matching a text")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=100, help="entries to print at most (default: 100)")
+    search.add_argument("--json", action="store_true", help="print whole entries as JSON lines")
+    search.set_defaults(run=cmd_search)
+
+    report = commands.add_parser("report", help="print a report")
+    report.add_argument("report_type", choices=REPORT_TYPES)
+    report.set_defaults(run=cmd_report)
+
+    export = commands.add_parser("export", help="write the collection as JSON, JSON Lines, CSV or an HTML catalog")
+    export.add_argument("--format", choices=("json", "jsonl", "csv", "html"), default="json")
+    export.add_argument("--output", "-o", help="file, or folder for html, to write (default: standard output)")
+    export.set_defaults(run=cmd_export)
+
+    import_ = commands.add_parser("import", help="add the entries of a CSV, JSON Lines or JSON file")
+    import_.add_argument("file")
+    import_.add_argument("--images", help="folder the image file names are relative to (default: the file's folder)")
+    import_.add_argument("--map", action="append", default=[], metavar="COLUMN=FIELD",
+                         help="read COLUMN into FIELD, or skip it if FIELD is empty (repeatable)")
+    import_.set_defaults(run=cmd_import)
+
+    reencode = commands.add_parser("reencode-images", help="re-encode stored images under IMAGE_PROFILE")
+    reencode.set_defaults(run=cmd_reencode_images)
+
+    args = parser.parse_args(argv)
+    if args.directory:
+        os.chdir(args.directory)
+    if args.command is None:
+        import EntryDex  # The GUI is only loaded when it is asked for
+        EntryDex.main()
+        return 0
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # The reader (e.g. `head`) stopped early; that is not an error worth a traceback.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
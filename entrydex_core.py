@@ -0,0 +1,2115 @@
+"""EntryDex data layer: storage, the collection, search, reports and image files.
+
+Has no GUI dependency, so scripts, the command line (entrydex_cli.py) and
+the app (EntryDex.py) can all build on it. PIL and NumPy are only
+imported once an image or a vectorized report is actually needed.
+"""
+import bisect
+import csv
+import functools
+import glob
+import hashlib
+import html
+import io
+import itertools
+import json
+import logging.handlers
+import multiprocessing
+import operator
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# --- Constants ---
+DATA_FILE = 'bottles.json'
+JOURNAL_FILE = 'bottles.journal'
+SQLITE_FILE = 'bottles.db'
+IMAGE_DIR = 'images'
+THUMB_DIR = os.path.join(IMAGE_DIR, '.thumbs')
+THUMB_SIZES = ((250, 250), (300, 300))  # EntryCard and editor preview sizes
+STAGING_DIR = os.path.join(IMAGE_DIR, '.staging')  # Imported images waiting for their entry to be saved
+
+# --- Image Storage Settings ---
+# How stored images are encoded. 'format' is 'PNG', 'JPEG' or 'WEBP'; 'quality' applies to the lossy
+# formats; images are downsized to fit 'max_edge' pixels on their longest side (0 keeps the full size);
+# 'strip_metadata' drops EXIF and ICC data. The default keeps images lossless and full size. Existing
+# images can be converted with `python entrydex_cli.py reencode-images`.
+IMAGE_PROFILE = {"format": "PNG", "quality": 0, "max_edge": 0, "strip_metadata": True}
+IMAGE_EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+
+# --- Field Definitions ---
+FIELDS = [
+    ("Name:", "name"), ("Type/Category:", "type"),
+    ("Color:", "color"), ("Era/Date Range:", "era"),
+    ("Condition:", "condition"), ("Embossing/Markings:", "embossing"),
+    ("Closure Type:", "closure_type"), ("Finish Type:", "finish_type"),
+    ("Base Markings:", "base_markings"), ("Location in Collection:", "location")
+]
+TEXT_KEYS = [key for _, key in FIELDS] + ["addresses", "links"]
+CATEGORY_KEYS = ("type", "color", "condition", "era")  # Few distinct values, shared between entries
+
+# --- Storage Settings ---
+STORAGE_BACKEND = 'json'  # 'json' (DATA_FILE plus journal) or 'sqlite' (SQLITE_FILE)
+USE_JOURNAL = True  # Append single changes to JOURNAL_FILE instead of rewriting DATA_FILE
+JOURNAL_COMPACT_BYTES = 512 * 1024  # Fold the journal back into DATA_FILE past this size
+SAVE_COALESCE_SECONDS = 0.3  # Saves requested within this window are written together
+SAVE_RETRY_SECONDS = 5.0  # Pause before a failed write is tried again
+LOAD_BATCH_SIZE = 500  # Entries read per batch when streaming the collection in
+
+# --- Bulk Import Settings ---
+IMPORT_IMAGE_SEPARATOR = ";"  # Separates the image file names in one CSV cell
+IMPORT_PROGRESS_ROWS = 1000  # Rows read between progress reports
+
+# --- Export Settings ---
+EXPORT_COLUMNS = ["id", *TEXT_KEYS, "image_paths"]  # CSV columns, in order
+EXPORT_PAGE_SIZE = 100  # Entries per page of the HTML catalog
+EXPORT_PROGRESS_ROWS = 500  # Entries written between progress reports
+
+# --- Instrumentation Settings ---
+# With tracing on, the hot paths record their duration, item counts and bytes in TRACE_LOG_FILE
+# (one JSON object per line) and in the app's Performance panel. Set ENTRYDEX_TRACE=1 to turn it on.
+TRACE = os.environ.get("ENTRYDEX_TRACE", "") not in ("", "0")
+TRACE_LOG_FILE = 'entrydex_trace.log'
+TRACE_LOG_BYTES = 1024 * 1024  # The log is rotated past this size
+TRACE_LOG_BACKUPS = 3  # Rotated logs kept (entrydex_trace.log.1, ...)
+TRACE_HISTORY = 500  # Recent timings kept per operation for the percentiles
+
+# --- Report Settings ---
+REPORT_DIMENSIONS = ("type", "color", "condition")  # Fields with running group-by counts for the reports
+
+_np = False  # NumPy once imported, None if it is not installed
+
+
+def _numpy():
+    """Returns NumPy, importing it on first use, or None when it is not installed."""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:  # Analytics fall back to plain loops over the same columns
+            _np = None
+    return _np
+
+
+# --- Instrumentation ---
+
+class Tracer:
+    """Keeps the recent timings of the instrumented operations and logs every one of them.
+
+    Operations are wrapped with @traced. While `enabled` is False they
+    run untouched apart from one attribute check. Cache hit counts are
+    kept either way, since counting is cheaper than checking.
+    """
+
+    def __init__(self, enabled=TRACE):
+        self.enabled = enabled
+        self._recent = {}  # operation -> deque of (ms, items, bytes)
+        self._hits = {}  # cache -> [hits, misses]
+        self._lock = threading.Lock()
+        self._logger = None
+
+    def record(self, operation, seconds, **fields):
+        """Records one run of `operation`; `fields` such as items= and bytes= go into the log too."""
+        if multiprocessing.parent_process() is not None:
+            return  # Worker processes inherit the setting; only the app's own process keeps the log
+        ms = seconds * 1000
+        with self._lock:
+            recent = self._recent.get(operation)
+            if recent is None:
+                recent = self._recent[operation] = deque(maxlen=TRACE_HISTORY)
+            recent.append((ms, fields.get("items"), fields.get("bytes")))
+        entry = {"time": round(time.time(), 3), "op": operation, "ms": round(ms, 3),
+                 "thread": threading.current_thread().name, **fields}
+        self._log().info(json.dumps(entry))
+
+    def count(self, cache, hit):
+        # Caches are hit from the loader and writer threads too; an unlocked += can drop counts.
+        with self._lock:
+            counts = self._hits.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def summary(self):
+        """Returns {operation: {calls, p50_ms, p95_ms, max_ms, items, bytes}} over the recent runs."""
+        with self._lock:
+            snapshot = {operation: list(recent) for operation, recent in self._recent.items()}
+        summary = {}
+        for operation, runs in snapshot.items():
+            times = sorted(ms for ms, _, _ in runs)
+            summary[operation] = {
+                "calls": len(times),
+                "p50_ms": times[len(times) // 2],
+                "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+                "max_ms": times[-1],
+                "items": sum(items or 0 for _, items, _ in runs),
+                "bytes": sum(size or 0 for _, _, size in runs),
+            }
+        return summary
+
+    def hit_rates(self):
+        """Returns {cache: (hits, misses)}."""
+        with self._lock:
+            return {cache: tuple(counts) for cache, counts in self._hits.items()}
+
+    def _log(self):
+        if self._logger is None:
+            logger = logging.getLogger("entrydex.trace")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            if not logger.handlers:
+                handler = logging.handlers.RotatingFileHandler(TRACE_LOG_FILE, maxBytes=TRACE_LOG_BYTES,
+                                                               backupCount=TRACE_LOG_BACKUPS, encoding='utf-8')
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+
+tracer = Tracer()
+
+
+def traced(operation, measure=None):
+    """Decorator timing each call under `operation` while tracing is on.
+
+    `measure(result, *args, **kwargs)` may return extra fields for the
+    record, typically 'items' and 'bytes'.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            tracer.record(operation, seconds, **(measure(result, *args, **kwargs) if measure else {}))
+            return result
+        return wrapper
+    return decorate
+
+
+def file_size(*paths):
+    """Total size in bytes of the files in `paths` that exist."""
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+# --- Backend Functions ---
+
+def load_data():
+    """Loads bottle data from the configured storage backend."""
+    return get_storage().load()
+
+
+def save_data(data):
+    """Saves bottle data to the configured storage backend."""
+    get_storage().save_all(data)
+
+
+def upgrade_legacy_images(data):
+    """Converts old single-image entries to the 'image_paths' list format.
+
+    Returns True if any entry had to be converted.
+    """
+    upgraded = False
+    for item in data:
+        if 'image_path' in item and 'image_paths' not in item:
+            item['image_paths'] = [item['image_path']] if item['image_path'] else []
+            del item['image_path']
+            upgraded = True
+    return upgraded
+
+
+_JSON_WHITESPACE = re.compile(r'\s*')
+_JSON_SEPARATORS = re.compile(r'[\s,]*')
+
+
+def iter_json_array(f, chunk_size=64 * 1024):
+    """Yields (item, characters consumed) for each item of the top-level JSON array in `f`.
+
+    The file is read in chunks, so items become available long before the
+    whole document has been read.
+    """
+    decoder = json.JSONDecoder()
+    offset = 0  # Characters already dropped from the front of the buffer
+    buffer = f.read(chunk_size)
+    pos = _JSON_WHITESPACE.match(buffer).end()
+    while pos == len(buffer):
+        # Nothing but whitespace so far; the array starts in a later chunk.
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        offset += len(buffer)
+        buffer = chunk
+        pos = _JSON_WHITESPACE.match(buffer).end()
+    if buffer[pos:pos + 1] != '[':
+        raise json.JSONDecodeError("Expecting '['", buffer, pos)
+    pos += 1
+    eof = False
+    while True:
+        pos = _JSON_SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer):
+            if buffer[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item, offset + end
+                pos = end
+                continue
+        elif eof:
+            raise json.JSONDecodeError("Unterminated array", buffer, pos)
+        # The next item is incomplete; read on.
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        offset += pos
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def write_json_snapshot(data):
+    """Writes the whole collection to DATA_FILE.
+
+    The data is written to a temporary file, fsynced and renamed over
+    DATA_FILE, so a crash mid-write never leaves a truncated collection.
+    """
+    temp_path = DATA_FILE + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, DATA_FILE)
+
+
+# --- Change Journal ---
+
+def _trim_torn_line(path):
+    """Cuts off an unfinished last line left by a crash mid-append, so new records start on their own line."""
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            return
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            cut = f.read(end - start).rfind(b'\n')
+            if cut != -1:
+                f.truncate(start + cut + 1)
+                return
+            end = start
+        f.truncate(0)
+
+
+def append_journal(changes):
+    """Appends compact change records, given as (op, bottle) pairs, to the journal."""
+    lines = []
+    for op, bottle in changes:
+        if op == 'delete':
+            entry = {'op': 'delete', 'id': bottle['id']}
+        else:
+            entry = {'op': 'put', 'bottle': bottle}
+        lines.append(json.dumps(entry, separators=(',', ':')) + '\n')
+    if os.path.exists(JOURNAL_FILE):
+        _trim_torn_line(JOURNAL_FILE)
+    with open(JOURNAL_FILE, 'a') as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_journal():
+    """Returns the net effect of the journal as {id: entry, or None if deleted}."""
+    changes = {}
+    if not os.path.exists(JOURNAL_FILE):
+        return changes
+    with open(JOURNAL_FILE, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn line from an interrupted write; the records around it are intact.
+                continue
+            if entry.get('op') == 'put':
+                changes[entry['bottle'].get('id')] = entry['bottle']
+            elif entry.get('op') == 'delete':
+                changes[entry.get('id')] = None
+    return changes
+
+
+def compact_journal(data):
+    """Writes a fresh snapshot of the collection and discards the journal."""
+    write_json_snapshot(data)
+    if os.path.exists(JOURNAL_FILE):
+        os.remove(JOURNAL_FILE)
+
+
+# --- Storage Backends ---
+
+class JsonStorage:
+    """The default backend: DATA_FILE as a snapshot plus the change journal."""
+
+    def __init__(self):
+        self.journal_size = os.path.getsize(JOURNAL_FILE) if os.path.exists(JOURNAL_FILE) else 0
+        self.legacy_upgraded = False
+        self.load_failed = False  # DATA_FILE could not be read; it must not be compacted over
+
+    @property
+    def supports_changes(self):
+        return USE_JOURNAL
+
+    def wants_snapshot(self, closing=False):
+        """Whether the journal should be folded back into a fresh snapshot."""
+        if self.load_failed:
+            return False  # Changes keep going to the journal; the unreadable snapshot stays as it is
+        if closing:
+            return self.journal_size > 0
+        return self.journal_size >= JOURNAL_COMPACT_BYTES
+
+    @traced("load_data", lambda data, self: {"items": len(data), "bytes": file_size(DATA_FILE, JOURNAL_FILE)})
+    def load(self):
+        """Returns every entry. Raises json.JSONDecodeError if DATA_FILE is corrupt."""
+        data = []
+        for batch, _ in self.iter_batches(LOAD_BATCH_SIZE):
+            data.extend(batch)
+        # Old single-image entries only need converting on disk once.
+        if self.legacy_upgraded:
+            self.save_all(data)
+        return data
+
+    def iter_batches(self, batch_size):
+        """Yields (entries, fraction done) while streaming DATA_FILE with the journal applied.
+
+        Sets `legacy_upgraded` if any old single-image entries were converted.
+        """
+        self.legacy_upgraded = False
+        changes = read_journal()
+        size = os.path.getsize(DATA_FILE) if os.path.exists(DATA_FILE) else 0
+        batch = []
+        if size:
+            try:
+                with open(DATA_FILE, 'r') as f:
+                    for item, consumed in iter_json_array(f):
+                        bottle_id = item.get('id')
+                        if bottle_id in changes:
+                            item = changes.pop(bottle_id)
+                            if item is None:
+                                continue
+                        batch.append(item)
+                        if len(batch) >= batch_size:
+                            yield self._upgrade(batch), min(consumed / size, 1.0)
+                            batch = []
+            except Exception:
+                self.load_failed = True
+                raise
+        # Entries that only exist in the journal come last.
+        batch.extend(item for item in changes.values() if item is not None)
+        if batch:
+            yield self._upgrade(batch), 1.0
+
+    def _upgrade(self, batch):
+        if upgrade_legacy_images(batch):
+            self.legacy_upgraded = True
+        return batch
+
+    @traced("save_data", lambda _, self, data: {"items": len(data), "bytes": file_size(DATA_FILE)})
+    def save_all(self, data):
+        if self.load_failed:
+            # Keep the snapshot that could not be read, and its journal, next to the new one for recovery.
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            for path in (DATA_FILE, JOURNAL_FILE):
+                if os.path.exists(path):
+                    os.replace(path, f"{path}.unreadable-{stamp}")
+            self.load_failed = False
+        compact_journal(data)
+        self.journal_size = 0
+
+    @traced("save_changes", lambda _, self, changes: {"items": len(changes)})
+    def write_changes(self, changes):
+        append_journal(changes)
+        self.journal_size = os.path.getsize(JOURNAL_FILE)
+
+    def close(self):
+        pass
+
+
+class SqliteStorage:
+    """Keeps one row per entry in SQLITE_FILE, with image paths in their own table.
+
+    Adds, edits and deletes touch only the affected rows.
+    """
+
+    def __init__(self, path=SQLITE_FILE):
+        # Loading happens on the main thread, writes on the persistence worker.
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        columns = ", ".join(f"{key} TEXT" for key in TEXT_KEYS)
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS bottles (id TEXT PRIMARY KEY, {columns}, extra TEXT);
+            CREATE TABLE IF NOT EXISTS bottle_images (
+                bottle_id TEXT NOT NULL REFERENCES bottles(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                PRIMARY KEY (bottle_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS idx_bottles_type ON bottles(type);
+            CREATE INDEX IF NOT EXISTS idx_bottles_color ON bottles(color);
+            CREATE INDEX IF NOT EXISTS idx_bottles_condition ON bottles(condition);
+            CREATE INDEX IF NOT EXISTS idx_bottles_era ON bottles(era);
+        """)
+        placeholders = ", ".join("?" for _ in TEXT_KEYS)
+        updates = ", ".join(f"{key} = excluded.{key}" for key in TEXT_KEYS)
+        self._upsert_sql = (f"INSERT INTO bottles (id, {', '.join(TEXT_KEYS)}, extra) VALUES (?, {placeholders}, ?) "
+                            f"ON CONFLICT(id) DO UPDATE SET {updates}, extra = excluded.extra")
+
+    supports_changes = True
+    legacy_upgraded = False
+    load_failed = False
+
+    def wants_snapshot(self, closing=False):
+        return False
+
+    @traced("load_data", lambda data, self: {"items": len(data), "bytes": file_size(self.path)})
+    def load(self):
+        return [bottle for batch, _ in self.iter_batches(LOAD_BATCH_SIZE) for bottle in batch]
+
+    def iter_batches(self, batch_size):
+        """Yields (entries, fraction done) while reading the bottles table."""
+        total = self.conn.execute("SELECT COUNT(*) FROM bottles").fetchone()[0]
+        images = {}
+        for bottle_id, path in self.conn.execute(
+                "SELECT bottle_id, path FROM bottle_images ORDER BY bottle_id, position"):
+            images.setdefault(bottle_id, []).append(path)
+        cursor = self.conn.execute(f"SELECT id, {', '.join(TEXT_KEYS)}, extra FROM bottles ORDER BY rowid")
+        done = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            batch = []
+            for row in rows:
+                bottle = {"id": row[0]}
+                for key, value in zip(TEXT_KEYS, row[1:-1]):
+                    if value is not None:
+                        bottle[key] = value
+                if row[-1]:
+                    bottle.update(json.loads(row[-1]))
+                bottle["image_paths"] = images.get(row[0], [])
+                batch.append(bottle)
+            done += len(rows)
+            yield batch, done / total
+
+    @traced("save_data", lambda _, self, data: {"items": len(data), "bytes": file_size(self.path)})
+    def save_all(self, data):
+        with self.conn:
+            self.conn.execute("DELETE FROM bottle_images")
+            self.conn.execute("DELETE FROM bottles")
+            for bottle in data:
+                self._put(bottle)
+
+    @traced("save_changes", lambda _, self, changes: {"items": len(changes)})
+    def write_changes(self, changes):
+        with self.conn:
+            for op, bottle in changes:
+                if op == 'delete':
+                    self.conn.execute("DELETE FROM bottles WHERE id = ?", (bottle['id'],))
+                else:
+                    self._put(bottle)
+
+    def close(self):
+        self.conn.close()
+
+    def _put(self, bottle):
+        known = set(TEXT_KEYS) | {"id", "image_paths"}
+        extra = {key: value for key, value in bottle.items() if key not in known}
+        self.conn.execute(self._upsert_sql, [bottle["id"]] + [bottle.get(key) for key in TEXT_KEYS] +
+                          [json.dumps(extra) if extra else None])
+        self.conn.execute("DELETE FROM bottle_images WHERE bottle_id = ?", (bottle["id"],))
+        self.conn.executemany("INSERT INTO bottle_images (bottle_id, position, path) VALUES (?, ?, ?)",
+                              [(bottle["id"], i, path) for i, path in enumerate(bottle.get("image_paths", []))])
+
+
+def migrate_json_to_sqlite(db_path=SQLITE_FILE):
+    """One-shot copy of DATA_FILE (and its journal) into a SQLite database.
+
+    Legacy single-image entries are upgraded on the way. Returns the number
+    of entries migrated.
+    """
+    data = JsonStorage().load()
+    storage = SqliteStorage(db_path)
+    try:
+        storage.save_all(data)
+    finally:
+        storage.close()
+    return len(data)
+
+
+_storage = None
+
+
+def get_storage():
+    """Returns the storage backend selected by STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == 'sqlite':
+            if not os.path.exists(SQLITE_FILE) and os.path.exists(DATA_FILE):
+                migrate_json_to_sqlite()
+            _storage = SqliteStorage()
+        else:
+            _storage = JsonStorage()
+    return _storage
+
+
+# --- Background Persistence ---
+
+class PersistenceWorker:
+    """Writes snapshots and journal records on a background thread.
+
+    The GUI hands over copies of the data and returns immediately; Bottles
+    are copied as bare slot values and only become dicts on the worker
+    thread, so queueing a snapshot stays cheap for large collections.
+    Requests arriving within SAVE_COALESCE_SECONDS of each other are written
+    in one go, and a snapshot supersedes any journal records queued before it.
+
+    A failed write stays queued and is tried again every SAVE_RETRY_SECONDS.
+    Callbacks passed as `on_written` run on the worker thread once the
+    write they were queued with has succeeded.
+    The first failure of a run is passed to `on_error`, which is called on
+    the worker thread; `error` holds the latest failure until a write succeeds.
+    """
+
+    def __init__(self, storage, on_error=None):
+        self.storage = storage
+        self.on_error = on_error
+        self.error = None
+        self._tasks = []
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="EntryDexWriter", daemon=True)
+        self._thread.start()
+
+    def save(self, data):
+        """Queues a full snapshot of `data`."""
+        self._submit(('snapshot', [copy_entry(item) for item in data]))
+
+    def record(self, data, op, bottle, on_written=None):
+        """Queues a single add, edit ('put') or delete of `bottle`.
+
+        Backends that support it write only the changed entry; otherwise, or
+        when the backend asks for compaction, the full collection is queued.
+        """
+        if not self.storage.supports_changes or self.storage.wants_snapshot():
+            task = ('snapshot', [copy_entry(item) for item in data])
+        else:
+            task = (op, copy_entry(bottle))
+        if on_written is None:
+            self._submit(task)
+        else:
+            self._submit(task, ('written', on_written))
+
+    def record_block(self, data, bottles):
+        """Queues many added or edited entries (e.g. a bulk import) to be written together."""
+        if not self.storage.supports_changes or self.storage.wants_snapshot():
+            self.save(data)
+        else:
+            self._submit(*[('put', copy_entry(bottle)) for bottle in bottles])
+
+    def flush(self):
+        """Blocks until every queued write has reached the disk, or a write has failed."""
+        with self._cond:
+            while (self._tasks or self._busy) and self.error is None:
+                self._cond.wait()
+
+    def close(self):
+        """Writes anything still pending and stops the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.storage.close()
+
+    def _submit(self, *tasks):
+        with self._cond:
+            self._tasks.extend(tasks)
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._tasks and not self._closed:
+                    self._cond.wait()
+                if not self._tasks:
+                    return
+                # Give a burst of rapid saves the chance to pile up, and a failing disk a rest.
+                pause = SAVE_COALESCE_SECONDS if self.error is None else SAVE_RETRY_SECONDS
+                deadline = time.monotonic() + pause
+                while not self._closed and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                tasks, self._tasks = self._tasks, []
+                self._busy = True
+            first_failure = False
+            written = []
+            try:
+                self._write([task for task in tasks if task[0] != 'written'])
+                self.error = None
+                written = [callback for kind, callback in tasks if kind == 'written']
+            except Exception as e:
+                print(f"Error saving data: {e}")
+                first_failure = self.error is None
+                self.error = e
+                with self._cond:
+                    if self._closed:
+                        return  # Nothing will retry after close(); `error` tells the caller
+                    # Put the batch back ahead of anything queued meanwhile.
+                    self._tasks[:0] = tasks
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+            if first_failure and self.on_error is not None:
+                self.on_error(self.error)
+            for callback in written:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error after saving data: {e}")
+
+    def _write(self, tasks):
+        snapshots = [i for i, (kind, _) in enumerate(tasks) if kind == 'snapshot']
+        if snapshots:
+            self.storage.save_all([entry_dict(copy) for copy in tasks[snapshots[-1]][1]])
+            tasks = tasks[snapshots[-1] + 1:]
+        if tasks:
+            self.storage.write_changes([(kind, entry_dict(copy)) for kind, copy in tasks])
+
+
+def copy_entry(item):
+    """Returns a copy of an entry that is cheap to take on the GUI thread; see entry_dict()."""
+    if isinstance(item, Bottle):
+        return item.copy_fields()
+    return dict(item)
+
+
+def entry_dict(copy):
+    """Turns a copy from copy_entry() back into a plain dict."""
+    if isinstance(copy, dict):
+        return copy
+    values, extra = copy
+    entry = {key: value for key, value in zip(_BOTTLE_KEYS, values) if value is not _UNSET}
+    if extra:
+        entry.update(extra)
+    return entry
+
+
+# --- Collection ---
+
+def id_number(bottle_id):
+    """Returns the numeric part of a 'BTLnnn' ID, or 0 for other IDs."""
+    if bottle_id and bottle_id.startswith("BTL") and bottle_id[3:].isdigit():
+        return int(bottle_id[3:])
+    return 0
+
+
+def generate_id(data):
+    """Generates a new unique ID for a bottle."""
+    if isinstance(data, BottleCollection):
+        return data.next_id()
+    if not data:
+        return "BTL001"
+    last_id_num = 0
+    for item in data:
+        num = id_number(item.get('id'))
+        if num > last_id_num:
+            last_id_num = num
+    new_num = last_id_num + 1
+    return f"BTL{new_num:03d}"
+
+
+def find_bottle_by_id(bottle_id, bottles):
+    """Finds a bottle and its index by its ID."""
+    if isinstance(bottles, BottleCollection):
+        return bottles.get(bottle_id), bottles.position(bottle_id)
+    for i, bottle in enumerate(bottles):
+        if bottle.get('id') == bottle_id:
+            return bottle, i
+    return None, -1
+
+
+_BOTTLE_KEYS = ("id", *TEXT_KEYS, "image_paths")
+_BOTTLE_SLOTS = frozenset(_BOTTLE_KEYS)
+_CATEGORY_SLOTS = frozenset(CATEGORY_KEYS)
+_UNSET = object()
+_slot_values = operator.attrgetter(*_BOTTLE_KEYS)
+
+
+class Bottle(MutableMapping):
+    """A single entry, stored in slots instead of a per-entry dict.
+
+    Behaves like the dict it replaces (get, [], items(), dict(bottle), ...),
+    so the frames keep working unchanged. Only fields that are set take up
+    space, categorical values are interned so that every 'Soda' or 'Aqua'
+    in the collection is the same string object, and keys outside the known
+    fields go into a small overflow dict.
+    """
+
+    __slots__ = _BOTTLE_KEYS + ("_extra",)
+
+    def __init__(self, values=()):
+        self._extra = None
+        for key, value in (values.items() if hasattr(values, 'items') else values):
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in _BOTTLE_SLOTS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _BOTTLE_SLOTS:
+            if key in _CATEGORY_SLOTS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _BOTTLE_SLOTS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in _BOTTLE_KEYS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Bottle({dict(self)!r})"
+
+    def values(self):
+        # Hot path for full-text search; skips the mixin's lookup of every key.
+        try:
+            values = list(_slot_values(self))
+        except AttributeError:  # Some fields are unset
+            values = [getattr(self, key, _UNSET) for key in _BOTTLE_KEYS]
+            values = [value for value in values if value is not _UNSET]
+        if self._extra:
+            values.extend(self._extra.values())
+        return values
+
+    def copy_fields(self):
+        """Returns (slot values, extra fields) as a copy that is much cheaper to take than dict(bottle)."""
+        try:
+            values = _slot_values(self)
+        except AttributeError:  # Some fields are unset
+            values = tuple([getattr(self, key, _UNSET) for key in _BOTTLE_KEYS])
+        return values, (dict(self._extra) if self._extra else None)
+
+    def get(self, key, default=None):
+        # Hot path for the frames and search; avoids the KeyError round-trip.
+        if key in _BOTTLE_SLOTS:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+
+class BottleCollection:
+    """The in-memory collection, indexed by ID.
+
+    Keeps an id -> entry dict, the IDs in sorted order and the highest
+    'BTLnnn' number handed out, so lookups, adds and deletes never scan the
+    whole collection. Entries are held as compact Bottle records. Iterating
+    yields them in load/insertion order, and to_list() gives back the
+    list-of-dicts shape the storage backends write.
+
+    Observers (such as the SearchIndex) are told about every change through
+    their bottle_added, bottle_updated and bottle_removed methods, so they
+    can keep themselves up to date without rescanning.
+    """
+
+    def __init__(self, bottles=()):
+        self._by_id = {}
+        self._sorted_ids = []
+        self._max_id_num = 0
+        self._observers = []
+        self.version = 0  # Bumped on every change, so callers can tell if cached results are stale
+        self.extend(bottles)
+
+    def add_observer(self, observer):
+        """Registers `observer` and replays the current entries to it."""
+        self._observers.append(observer)
+        for bottle in self._by_id.values():
+            observer.bottle_added(bottle)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, bottle_id):
+        return bottle_id in self._by_id
+
+    def get(self, bottle_id):
+        return self._by_id.get(bottle_id)
+
+    def position(self, bottle_id):
+        """Returns the entry's index in ID order, or -1 if it is not present."""
+        i = bisect.bisect_left(self._sorted_ids, bottle_id)
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == bottle_id:
+            return i
+        return -1
+
+    def ids_in_order(self):
+        """Returns a copy of the sorted ID list."""
+        return list(self._sorted_ids)
+
+    def in_id_order(self, limit=None):
+        """Returns the entries (or the first `limit`) sorted by ID without re-sorting them."""
+        return [self._by_id[bottle_id] for bottle_id in self._sorted_ids[:limit]]
+
+    def next_id(self):
+        """Returns the next free 'BTLnnn' ID.
+
+        The counter only moves forward, so IDs freed by deletes are not
+        handed out again while the app is running.
+        """
+        return f"BTL{self._max_id_num + 1:03d}"
+
+    def add(self, bottle):
+        """Adds an entry (a dict or Bottle) and returns the stored Bottle."""
+        if not isinstance(bottle, Bottle):
+            bottle = Bottle(bottle)
+        bottle_id = bottle['id']
+        if bottle_id in self._by_id:
+            raise ValueError(f"Duplicate entry ID '{bottle_id}'")
+        self._by_id[bottle_id] = bottle
+        if not self._sorted_ids or bottle_id > self._sorted_ids[-1]:
+            self._sorted_ids.append(bottle_id)
+        else:
+            bisect.insort(self._sorted_ids, bottle_id)
+        self._max_id_num = max(self._max_id_num, id_number(bottle_id))
+        self.version += 1
+        for observer in self._observers:
+            observer.bottle_added(bottle)
+        return bottle
+
+    def extend(self, bottles):
+        """Adds many loaded entries at once; a repeated ID replaces the earlier entry."""
+        new_ids = []
+        self.version += 1
+        for bottle in bottles:
+            if not isinstance(bottle, Bottle):
+                bottle = Bottle(bottle)
+            bottle_id = bottle.get('id')
+            replaced = bottle_id in self._by_id
+            if not replaced:
+                new_ids.append(bottle_id)
+            self._by_id[bottle_id] = bottle
+            self._max_id_num = max(self._max_id_num, id_number(bottle_id))
+            for observer in self._observers:
+                if replaced:
+                    observer.bottle_updated(bottle)
+                else:
+                    observer.bottle_added(bottle)
+        # Loads are usually already in ID order, which makes this a plain append.
+        already_sorted = (all(a < b for a, b in zip(new_ids, new_ids[1:])) and
+                          (not self._sorted_ids or not new_ids or new_ids[0] > self._sorted_ids[-1]))
+        self._sorted_ids.extend(new_ids)
+        if not already_sorted:
+            self._sorted_ids.sort()
+
+    def add_block(self, entries):
+        """Adds new entries under one contiguous block of fresh IDs and returns the stored Bottles.
+
+        The whole block is reserved in one step instead of asking
+        next_id() per entry; any 'id' the entries carry is replaced.
+        """
+        first = self._max_id_num + 1
+        bottles = []
+        for number, entry in enumerate(entries, first):
+            bottle = entry if isinstance(entry, Bottle) else Bottle(entry)
+            bottle['id'] = f"BTL{number:03d}"
+            bottles.append(bottle)
+        self.extend(bottles)
+        return bottles
+
+    def update(self, bottle_id, values):
+        """Applies `values` to an existing entry and returns it."""
+        bottle = self._by_id[bottle_id]
+        bottle.update(values)
+        self.version += 1
+        for observer in self._observers:
+            observer.bottle_updated(bottle)
+        return bottle
+
+    def remove(self, bottle_id):
+        bottle = self._by_id.pop(bottle_id)
+        del self._sorted_ids[bisect.bisect_left(self._sorted_ids, bottle_id)]
+        self.version += 1
+        for observer in self._observers:
+            observer.bottle_removed(bottle)
+        return bottle
+
+    def clear(self):
+        for bottle_id in list(self._by_id):
+            self.remove(bottle_id)
+
+    def to_list(self):
+        return [dict(bottle) for bottle in self._by_id.values()]
+
+
+class ChangeTracker:
+    """Collects the IDs added, modified and removed since the last drain().
+
+    A BottleCollection observer; the collection view uses it to patch only
+    the affected rows instead of rebuilding.
+    """
+
+    def __init__(self):
+        self.added = set()
+        self.modified = set()
+        self.removed = set()
+
+    def __bool__(self):
+        return bool(self.added or self.modified or self.removed)
+
+    def bottle_added(self, bottle):
+        bottle_id = bottle.get('id')
+        if bottle_id in self.removed:
+            # Deleted and re-added since the last drain: to the view it is just different.
+            self.removed.discard(bottle_id)
+            self.modified.add(bottle_id)
+        else:
+            self.added.add(bottle_id)
+
+    def bottle_updated(self, bottle):
+        if bottle.get('id') not in self.added:
+            self.modified.add(bottle.get('id'))
+
+    def bottle_removed(self, bottle):
+        bottle_id = bottle.get('id')
+        if bottle_id in self.added:
+            self.added.discard(bottle_id)
+        else:
+            self.modified.discard(bottle_id)
+            self.removed.add(bottle_id)
+
+    def drain(self):
+        """Returns (added, modified, removed) and starts collecting afresh."""
+        changes = (self.added, self.modified, self.removed)
+        self.added, self.modified, self.removed = set(), set(), set()
+        return changes
+
+
+class ImageRefs:
+    """Counts how many entries use each image file.
+
+    A BottleCollection observer. Stored images are named by content and
+    may be shared between entries, so a file can only be deleted once no
+    entry refers to it any more.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self._paths = {}  # id -> image paths counted for that entry
+
+    def bottle_added(self, bottle):
+        paths = tuple(bottle.get('image_paths') or ())
+        self._paths[bottle.get('id')] = paths
+        for path in paths:
+            self.counts[path] = self.counts.get(path, 0) + 1
+
+    def bottle_updated(self, bottle):
+        self.bottle_removed(bottle)
+        self.bottle_added(bottle)
+
+    def bottle_removed(self, bottle):
+        for path in self._paths.pop(bottle.get('id'), ()):
+            if self.counts[path] == 1:
+                del self.counts[path]
+            else:
+                self.counts[path] -= 1
+
+    def is_used(self, path):
+        return path in self.counts
+
+
+# --- Report Aggregates ---
+
+_report_values = {}  # raw field value -> report value
+
+
+def report_value(value):
+    """Returns the value reports group a raw field value under."""
+    key = _report_values.get(value)
+    if key is None:
+        key = _report_values[value] = value.strip().title() or 'Unknown'
+    return key
+
+
+class ReportAggregates:
+    """Running group-by aggregates for the report dimensions.
+
+    A BottleCollection observer: for every dimension it maps each
+    normalized value to the IDs of the entries having it, and keeps that
+    up to date per change, so reports never scan the collection.
+    """
+
+    def __init__(self, dimensions=REPORT_DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        self.groups = {dimension: {} for dimension in self.dimensions}  # dimension -> value -> ids
+        self._keys = {}  # id -> the entry's value per dimension
+
+    def bottle_added(self, bottle):
+        bottle_id = bottle.get('id')
+        keys = tuple(report_value(bottle.get(dimension, 'Unknown')) for dimension in self.dimensions)
+        self._keys[bottle_id] = keys
+        for dimension, key in zip(self.dimensions, keys):
+            members = self.groups[dimension].get(key)
+            if members is None:
+                members = self.groups[dimension][key] = set()
+            members.add(bottle_id)
+
+    def bottle_updated(self, bottle):
+        self.bottle_removed(bottle)
+        self.bottle_added(bottle)
+
+    def bottle_removed(self, bottle):
+        bottle_id = bottle.get('id')
+        keys = self._keys.pop(bottle_id, None)
+        if keys is None:
+            return
+        for dimension, key in zip(self.dimensions, keys):
+            members = self.groups[dimension][key]
+            members.discard(bottle_id)
+            if not members:
+                del self.groups[dimension][key]
+
+    def counts(self, dimension):
+        """Returns {value: number of entries} for `dimension`."""
+        return {key: len(members) for key, members in self.groups[dimension].items()}
+
+    def members(self, dimension):
+        """Returns {value: set of entry IDs} for `dimension`. Do not modify the sets."""
+        return self.groups[dimension]
+
+
+# --- Analytics ---
+
+_ERA_RE = re.compile(r"(?:\b(early|mid|late)[\s-]*)?(\d{4})('?s)?(?:\s*(?:-|–|to)\s*(\d{4}|\d{2}(?='?s\b|\b))('?s)?)?")
+_eras = {}  # era text -> parse_era() result
+
+
+def parse_era(text):
+    """Parses a free-text era into an inclusive (first year, last year) range, or None.
+
+    Understands "1880-1900", "1900-20", "1890-10", "1920s-30s", "1890s",
+    "c. 1875", "Late 1800s" and the like; a plural year ending in 00 is
+    read as a century, and a two-digit end year falls in the century that
+    puts it after the start.
+    Results are memoized, as the same eras recur throughout a collection.
+    """
+    era = _eras.get(text, False)
+    if era is not False:
+        return era
+    era = None
+    match = _ERA_RE.search(text.lower())
+    if match:
+        qualifier, start, plural, end, end_plural = match.groups()
+        first = int(start)
+        span = (99 if first % 100 == 0 else 9) if plural else 0
+        last = first + span
+        if qualifier and span:
+            third = (span + 1) // 3
+            if qualifier == 'early':
+                last = first + third - 1
+            elif qualifier == 'mid':
+                first, last = first + third, first + 2 * third - 1
+            else:
+                first += 2 * third
+        if end:
+            if len(end) == 4:
+                end_year = int(end)
+            else:
+                end_year = first // 100 * 100 + int(end)
+                if end_year < first:
+                    end_year += 100  # "1890-10" runs into the next century
+            if end_plural:
+                end_year += 99 if end_year % 100 == 0 else 9
+            if end_year >= first:
+                last = max(last, end_year)
+        era = (first, last)
+    _eras[text] = era
+    return era
+
+
+def _location_area(location):
+    """'Shelf A12' -> 'Shelf A', 'Cabinet 3' -> 'Cabinet': the place without its slot number."""
+    return location.rstrip('0123456789 #.-') or location
+
+
+class CollectionColumns:
+    """Columnar copy of the fields the analytics reports work on.
+
+    A BottleCollection observer. Each entry owns one row. Category fields
+    are dictionary-encoded into integer code columns and the era is
+    parsed once into first/last year columns, all kept in compact
+    array.array buffers that NumPy views without copying, so reports are
+    a few vectorized passes. Without NumPy the same columns are looped
+    over in Python. Rows of deleted entries are marked dead and reused.
+    """
+
+    CATEGORY_COLUMNS = ("type", "color", "condition", "location")
+
+    def __init__(self):
+        self.rows = {}  # id -> row
+        self.free_rows = []
+        self.alive = array('b')
+        self.codes = {name: array('i') for name in self.CATEGORY_COLUMNS}
+        self.labels = {name: [] for name in self.CATEGORY_COLUMNS}  # code -> report value
+        self._code_of = {name: {} for name in self.CATEGORY_COLUMNS}  # report value -> code
+        self.era_first = array('i')  # 0 where the era could not be parsed
+        self.era_last = array('i')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _code(self, name, value):
+        value = report_value(value)
+        code = self._code_of[name].get(value)
+        if code is None:
+            code = self._code_of[name][value] = len(self.labels[name])
+            self.labels[name].append(value)
+        return code
+
+    def bottle_added(self, bottle):
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            row = len(self.alive)
+            self.alive.append(0)
+            for column in self.codes.values():
+                column.append(0)
+            self.era_first.append(0)
+            self.era_last.append(0)
+        self.rows[bottle.get('id')] = row
+        self._write(row, bottle)
+
+    def bottle_updated(self, bottle):
+        self._write(self.rows[bottle.get('id')], bottle)
+
+    def bottle_removed(self, bottle):
+        row = self.rows.pop(bottle.get('id'), None)
+        if row is not None:
+            self.alive[row] = 0
+            self.free_rows.append(row)
+
+    def _write(self, row, bottle):
+        self.alive[row] = 1
+        for name, column in self.codes.items():
+            column[row] = self._code(name, bottle.get(name, 'Unknown'))
+        era = parse_era(bottle.get('era', ''))
+        self.era_first[row], self.era_last[row] = era or (0, 0)
+
+    # Views are only held for the duration of a call: an array.array
+    # cannot grow while NumPy still references its buffer.
+    def _alive_mask(self, np):
+        return np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+
+    def counts(self, name):
+        """Returns {report value: number of entries} for the category column `name`."""
+        labels = self.labels[name]
+        np = _numpy()
+        if np is not None:
+            totals = np.bincount(np.frombuffer(self.codes[name], dtype=np.intc)[self._alive_mask(np)],
+                                 minlength=len(labels)).tolist()
+        else:
+            totals = [0] * len(labels)
+            for alive, code in zip(self.alive, self.codes[name]):
+                if alive:
+                    totals[code] += 1
+        return {label: total for label, total in zip(labels, totals) if total}
+
+    def cross_tab(self, row_name, column_name):
+        """Returns (row values, column values, counts) of entries per combination, without empty rows or columns.
+
+        counts[i][j] is the number of entries with the i-th row value and
+        the j-th column value; both value lists are sorted.
+        """
+        row_labels, column_labels = self.labels[row_name], self.labels[column_name]
+        width = len(column_labels)
+        np = _numpy()
+        if np is not None:
+            mask = self._alive_mask(np)
+            cells = (np.frombuffer(self.codes[row_name], dtype=np.intc)[mask].astype(np.int64) * width +
+                     np.frombuffer(self.codes[column_name], dtype=np.intc)[mask])
+            table = np.bincount(cells, minlength=len(row_labels) * width).reshape(len(row_labels), width).tolist()
+        else:
+            table = [[0] * width for _ in row_labels]
+            for alive, row_code, column_code in zip(self.alive, self.codes[row_name], self.codes[column_name]):
+                if alive:
+                    table[row_code][column_code] += 1
+        rows = sorted((i for i in range(len(row_labels)) if any(table[i])), key=row_labels.__getitem__)
+        columns = sorted((j for j in range(width) if any(table[i][j] for i in rows)), key=column_labels.__getitem__)
+        return ([row_labels[i] for i in rows], [column_labels[j] for j in columns],
+                [[table[i][j] for j in columns] for i in rows])
+
+    def era_histogram(self):
+        """Returns ([(decade, entries whose era overlaps it)], entries without a readable era)."""
+        np = _numpy()
+        if np is not None:
+            mask = self._alive_mask(np)
+            first = np.frombuffer(self.era_first, dtype=np.intc)[mask]
+            last = np.frombuffer(self.era_last, dtype=np.intc)[mask]
+            dated = first > 0
+            undated = int(mask.sum() - dated.sum())
+            if not dated.any():
+                return [], undated
+            first_decade = first[dated] // 10
+            last_decade = last[dated] // 10
+            base = int(first_decade.min())
+            span = int(last_decade.max()) - base + 2
+            # +1 where a range starts and -1 after it ends; the running sum counts overlaps per decade.
+            changes = (np.bincount(first_decade - base, minlength=span) -
+                       np.bincount(last_decade - base + 1, minlength=span))
+            totals = np.cumsum(changes)[:-1].tolist()
+        else:
+            ranges = [(first // 10, last // 10) for alive, first, last in zip(self.alive, self.era_first, self.era_last)
+                      if alive and first]
+            undated = sum(self.alive) - len(ranges)
+            if not ranges:
+                return [], undated
+            base = min(first for first, _ in ranges)
+            span = max(last for _, last in ranges) - base + 2
+            changes = [0] * span
+            for first, last in ranges:
+                changes[first - base] += 1
+                changes[last - base + 1] -= 1
+            totals = list(itertools.accumulate(changes))[:-1]
+        return [((base + i) * 10, total) for i, total in enumerate(totals)], undated
+
+    def location_summary(self):
+        """Returns [(area, entries, [(location, entries), ...])], busiest areas and locations first."""
+        areas = {}
+        for location, total in self.counts("location").items():
+            areas.setdefault(_location_area(location), []).append((location, total))
+        summary = [(area, sum(total for _, total in locations),
+                    sorted(locations, key=lambda item: (-item[1], item[0])))
+                   for area, locations in areas.items()]
+        return sorted(summary, key=lambda item: (-item[1], item[0]))
+
+
+# --- Report Output ---
+
+def iter_report(report_type, bottles, aggregates, analytics):
+    """Yields the output of a report, computing as little as possible ahead of what is consumed.
+
+    Plain strings are lines. (title, line count, lines) tuples are
+    groups, whose `lines` iterator is lazy, so a consumer showing only
+    the first page of a big group never builds the rest.
+    """
+    if report_type in ("type", "color"):
+        yield f"--- Entries by {report_type.title()} ---"
+        yield ""
+        for item, count in sorted(aggregates.counts(report_type).items()):
+            yield f"{item}: {count}"
+    elif report_type == "condition":
+        yield "--- Entries by Condition ---"
+        for item, members in sorted(aggregates.members("condition").items()):
+            yield f"{item}: {len(members)}", len(members), _condition_lines(bottles, members)
+    elif report_type == "era":
+        decades, undated = analytics.era_histogram()
+        yield "--- Entries by Decade (an era spanning several decades counts in each) ---"
+        yield ""
+        peak = max((count for _, count in decades), default=0)
+        for decade, count in decades:
+            bar = "█" * round(40 * count / peak) if peak else ""
+            yield f"{decade}s {count:>7}  {bar}"
+        yield ""
+        yield f"No readable era: {undated}"
+    elif report_type == "type_color":
+        types, colors, table = analytics.cross_tab("type", "color")
+        yield "--- Entries by Type and Color ---"
+        yield ""
+        label_width = max(map(len, types + ["Type"]))
+        widths = [max(len(color), 5) for color in colors]
+        header = " | ".join(["Type".ljust(label_width)] +
+                            [color.rjust(width) for color, width in zip(colors, widths)] + ["Total"])
+        yield header
+        yield "-" * len(header)
+        for item, counts in zip(types, table):
+            yield " | ".join([item.ljust(label_width)] +
+                             [str(count).rjust(width) for count, width in zip(counts, widths)] +
+                             [str(sum(counts)).rjust(5)])
+    elif report_type == "location":
+        yield "--- Entries by Location ---"
+        for area, count, locations in analytics.location_summary():
+            yield (f"{area}: {count} entries in {len(locations)} location(s)", len(locations),
+                   (f"  - {location}: {location_count}" for location, location_count in locations))
+
+
+def _condition_lines(bottles, members):
+    # Sorting waits until the group is first shown.
+    names = sorted(f"{bottles.get(bottle_id).get('name', 'Unnamed')} (ID: {bottle_id})" for bottle_id in members)
+    for name in names:
+        yield f"  - {name}"
+
+
+# --- Search Index ---
+
+_TOKEN_RE = re.compile(r'\w+')
+_WORD_QUERY_RE = re.compile(r'\w+$')
+
+
+def _trigrams(*texts):
+    return {text[i:i + 3] for text in texts for i in range(len(text) - 2)}
+
+
+def search_bottles(bottles, query):
+    """Returns the entries having `query` as a case-insensitive substring of a string value.
+
+    A single pass over the entries, which beats building a SearchIndex
+    for a one-off search such as one from the command line.
+    """
+    query = query.lower()
+    return [bottle for bottle in bottles
+            if any(query in value.lower() for value in bottle.values() if isinstance(value, str))]
+
+
+class SearchIndex:
+    """Inverted token index plus a trigram index over every string field.
+
+    Matches exactly what the old scan matched (the query as a case-insensitive
+    substring of any string value), but only looks at entries that can
+    contain the query: those holding all of its trigrams, or for one- and
+    two-character queries, those with a word containing it. Kept current as
+    a BottleCollection observer; new entries are queued and indexed in idle
+    time, and a search scans the ones still queued instead of waiting for them.
+    """
+
+    def __init__(self):
+        self._values = {}  # id -> lowercased string values
+        self._trigrams = {}  # trigram -> ids
+        self._tokens = {}  # word -> ids
+        self._pending = {}  # id -> entry not indexed yet
+
+    def bottle_added(self, bottle):
+        # Indexing is deferred so that bulk loads stay cheap; see index_pending().
+        self._pending[bottle.get('id')] = bottle
+
+    def bottle_updated(self, bottle):
+        self.bottle_removed(bottle)
+        self.bottle_added(bottle)
+
+    def bottle_removed(self, bottle):
+        bottle_id = bottle.get('id')
+        if self._pending.pop(bottle_id, None) is not None:
+            return
+        values = self._values.pop(bottle_id, [])
+        for gram in _trigrams(*values):
+            self._discard(self._trigrams, gram, bottle_id)
+        for token in set(_TOKEN_RE.findall(" ".join(values))):
+            self._discard(self._tokens, token, bottle_id)
+
+    def index_pending(self, limit=None):
+        """Indexes up to `limit` (default: all) deferred entries; returns True once none are left."""
+        trigram_index, token_index = self._trigrams, self._tokens
+        while self._pending and limit != 0:
+            bottle_id, bottle = self._pending.popitem()
+            values = [value.lower() for value in bottle.values() if isinstance(value, str)]
+            self._values[bottle_id] = values
+            for gram in _trigrams(*values):
+                ids = trigram_index.get(gram)
+                if ids is None:
+                    trigram_index[gram] = {bottle_id}
+                else:
+                    ids.add(bottle_id)
+            for token in set(_TOKEN_RE.findall(" ".join(values))):
+                ids = token_index.get(token)
+                if ids is None:
+                    token_index[token] = {bottle_id}
+                else:
+                    ids.add(bottle_id)
+            if limit is not None:
+                limit -= 1
+        return not self._pending
+
+    def search(self, query, within=None):
+        """Returns the set of IDs whose string values contain `query` (already lowercased).
+
+        Pass the matches of a shorter query contained in this one as `within`
+        to narrow those down instead of consulting the index again. Entries
+        not indexed yet are scanned, so a search never waits for the index.
+        """
+        matches = self._search_indexed(query, within)
+        for bottle_id, bottle in self._pending.items():
+            if ((within is None or bottle_id in within) and
+                    any(query in value.lower() for value in bottle.values() if isinstance(value, str))):
+                matches.add(bottle_id)
+        return matches
+
+    def _search_indexed(self, query, within):
+        if within is not None:
+            candidates = within
+        elif len(query) >= 3:
+            postings = [self._trigrams.get(gram) for gram in _trigrams(query)]
+            if not all(postings):
+                return set()
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        elif _WORD_QUERY_RE.match(query):
+            # A run of word characters can only occur inside a single indexed word.
+            return set().union(*(ids for token, ids in self._tokens.items() if query in token))
+        else:
+            candidates = self._values.keys()
+        return {bottle_id for bottle_id in candidates
+                if any(query in value for value in self._values.get(bottle_id, ()))}
+
+    @staticmethod
+    def _discard(index, key, bottle_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(bottle_id)
+            if not ids:
+                del index[key]
+
+
+# --- Thumbnail Cache ---
+
+def _thumbnail_prefix(path):
+    return hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+
+
+def thumbnail_path(path, size):
+    """Returns where the cached `size` thumbnail of `path` lives.
+
+    The name includes the source's mtime and byte size, so a rewritten
+    source never matches a stale thumbnail.
+    """
+    st = os.stat(path)
+    return os.path.join(THUMB_DIR, f"{_thumbnail_prefix(path)}_{st.st_mtime_ns}_{st.st_size}_{size[0]}x{size[1]}.png")
+
+
+def make_thumbnail(path, size, source=None):
+    """Renders and caches the `size` thumbnail of `path`, from `source` if the image is already in memory."""
+    from PIL import Image
+
+    if source is not None:
+        thumb = source.copy()
+        thumb.thumbnail(size, Image.Resampling.LANCZOS)
+    else:
+        with Image.open(path) as thumb:
+            thumb.draft('RGB', size)  # Lets JPEGs decode straight at a reduced scale
+            thumb.thumbnail(size, Image.Resampling.LANCZOS)
+    if thumb.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+        thumb = thumb.convert('RGB')
+    destination_path = thumbnail_path(path, size)
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    temp_path = f"{destination_path}.{os.getpid()}.{threading.get_ident()}.tmp"  # ImageLoader workers may race on one file
+    thumb.save(temp_path, "PNG")
+    os.replace(temp_path, destination_path)
+    return thumb
+
+
+@traced("load_thumbnail", lambda thumb, path, size: {"items": 1, "bytes": len(thumb.mode) * thumb.width * thumb.height})
+def load_thumbnail(path, size):
+    """Returns a `size` thumbnail of the image at `path`, decoding the original only on a cache miss."""
+    from PIL import Image
+
+    try:
+        with Image.open(thumbnail_path(path, size)) as thumb:
+            thumb.load()
+    except OSError:
+        tracer.count("thumbnail files", False)
+        return make_thumbnail(path, size)
+    tracer.count("thumbnail files", True)
+    return thumb
+
+
+def invalidate_thumbnails(path):
+    """Deletes every cached thumbnail of `path`."""
+    for thumb_path in glob.glob(os.path.join(THUMB_DIR, _thumbnail_prefix(path) + '_*')):
+        try:
+            os.remove(thumb_path)
+        except OSError:
+            pass
+
+
+# --- Image Ingest ---
+
+def worker_pool(max_workers=None):
+    """Returns a process pool for image work (ingest, bulk import, HTML export).
+
+    Workers are spawned rather than forked: a forked child would inherit
+    the parent's threads and Tk state mid-flight, which can deadlock it.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def ingest_image(source_path, staged_stem, profile=None):
+    """Decodes `source_path`, applies its EXIF orientation and writes it under the image profile.
+
+    The result goes to `staged_stem` plus the profile's extension, and
+    its path is returned. Runs in a worker process, so it also renders
+    the preview thumbnails while the image is decoded anyway.
+    """
+    from PIL import Image, ImageOps
+
+    profile = profile or IMAGE_PROFILE
+    staged_path = staged_stem + IMAGE_EXTENSIONS[profile["format"]]
+    with Image.open(source_path) as image:
+        if profile["max_edge"]:
+            image.draft('RGB', (profile["max_edge"], profile["max_edge"]))
+        image = ImageOps.exif_transpose(image)
+        os.makedirs(STAGING_DIR, exist_ok=True)
+        with open(staged_path, 'wb') as f:
+            image = encode_image(image, f, profile)
+        for size in THUMB_SIZES:
+            make_thumbnail(staged_path, size, source=image)
+    return staged_path
+
+
+def import_image(source_path, profile=None):
+    """Decodes `source_path`, applies its EXIF orientation and stores it in IMAGE_DIR.
+
+    The bulk import's counterpart to ingest_image: its entries are saved
+    right away, so the image skips the staging folder. Returns (stored
+    path, True if the file was not stored before).
+    """
+    from PIL import Image, ImageOps
+
+    profile = profile or IMAGE_PROFILE
+    with Image.open(source_path) as image:
+        if profile["max_edge"]:
+            image.draft('RGB', (profile["max_edge"], profile["max_edge"]))
+        return _store_image(ImageOps.exif_transpose(image), profile)
+
+
+def is_staged(path):
+    """True for an imported image whose entry has not been saved yet."""
+    return os.path.dirname(os.path.abspath(path)) == os.path.abspath(STAGING_DIR)
+
+
+# --- Image Storage ---
+
+def encode_image(pil_image, f, profile=None):
+    """Writes `pil_image` to the file object `f` under the image profile and returns the image as encoded.
+
+    The returned image is the downsized, mode-converted one, which is
+    handy for rendering thumbnails without decoding the result again.
+    """
+    from PIL import Image
+
+    profile = profile or IMAGE_PROFILE
+    image_format = profile["format"]
+    max_edge = profile["max_edge"]
+    if max_edge and max(pil_image.size) > max_edge:
+        pil_image = pil_image.copy()
+        pil_image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    # JPEG has no alpha channel; PNG keeps the RGB conversion stored images always had.
+    keeps_alpha = image_format == "WEBP" and pil_image.mode in ('RGBA', 'LA', 'P')
+    target_mode = 'RGBA' if keeps_alpha else 'RGB'
+    if pil_image.mode not in (target_mode, 'L'):
+        pil_image = pil_image.convert(target_mode)
+    options = {}
+    if image_format in ("JPEG", "WEBP"):
+        options["quality"] = profile["quality"]
+    if image_format == "JPEG":
+        options["optimize"] = True
+    if image_format == "WEBP":
+        options["method"] = 4
+    if not profile["strip_metadata"]:
+        for key in ("exif", "icc_profile"):
+            if pil_image.info.get(key):
+                options[key] = pil_image.info[key]
+    pil_image.save(f, image_format, **options)
+    return pil_image
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_image_file(path):
+    """Moves an encoded image into IMAGE_DIR under the hash of its content and returns the stored path.
+
+    If identical bytes are already stored, `path` is dropped and the
+    existing file is shared instead.
+    """
+    destination_path = os.path.join(IMAGE_DIR, _file_digest(path) + os.path.splitext(path)[1])
+    if os.path.exists(destination_path):
+        os.remove(path)
+    else:
+        os.replace(path, destination_path)
+    return destination_path
+
+
+def store_image(pil_image, profile=None):
+    """Encodes `pil_image` into IMAGE_DIR under the hash of its content and returns the stored path."""
+    return _store_image(pil_image, profile)[0]
+
+
+def _store_image(pil_image, profile=None):
+    profile = profile or IMAGE_PROFILE
+    buffer = io.BytesIO()
+    encode_image(pil_image, buffer, profile)
+    data = buffer.getvalue()
+    destination_path = os.path.join(IMAGE_DIR, hashlib.sha1(data).hexdigest() + IMAGE_EXTENSIONS[profile["format"]])
+    if os.path.exists(destination_path):
+        return destination_path, False
+    temp_path = f"{destination_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, destination_path)
+    return destination_path, True
+
+
+def reencode_images(report=print):
+    """Re-encodes every image stored in IMAGE_DIR under IMAGE_PROFILE and points the entries at the results.
+
+    Meant to be run while the app is closed. Images already in the
+    profile's format and within its size are left alone, so lossy
+    formats do not lose quality on every run. Reports the total size
+    and the time to decode the converted images before and after, and
+    returns them as a dict.
+    """
+    from PIL import Image
+
+    storage = get_storage()
+    data = storage.load()
+    image_dir = os.path.abspath(IMAGE_DIR)
+    paths = sorted({path for bottle in data for path in bottle.get('image_paths', [])
+                    if os.path.dirname(os.path.abspath(path)) == image_dir and os.path.exists(path)})
+    extension = IMAGE_EXTENSIONS[IMAGE_PROFILE["format"]]
+    max_edge = IMAGE_PROFILE["max_edge"]
+    stats = {"images": 0, "bytes_before": 0, "bytes_after": 0, "decode_before": 0.0, "decode_after": 0.0}
+    replaced = {}
+    for i, path in enumerate(paths, 1):
+        try:
+            start = time.perf_counter()
+            with Image.open(path) as image:
+                if path.lower().endswith(extension) and (not max_edge or max(image.size) <= max_edge):
+                    continue
+                image.load()
+                stats["decode_before"] += time.perf_counter() - start
+                new_path = store_image(image)
+        except Exception as e:
+            report(f"Skipped {path}: {e}")
+            continue
+        stats["images"] += 1
+        stats["bytes_before"] += os.path.getsize(path)
+        stats["bytes_after"] += os.path.getsize(new_path)
+        start = time.perf_counter()
+        with Image.open(new_path) as image:
+            image.load()
+        stats["decode_after"] += time.perf_counter() - start
+        if new_path != path:
+            replaced[path] = new_path
+        report(f"[{i}/{len(paths)}] {path} -> {new_path}")
+
+    if replaced:
+        for bottle in data:
+            bottle['image_paths'] = [replaced.get(path, path) for path in bottle.get('image_paths', [])]
+        storage.save_all(data)
+        for path in replaced:
+            invalidate_thumbnails(path)
+            os.remove(path)
+    storage.close()
+
+    if stats["images"]:
+        report(f"Re-encoded {stats['images']} images as {IMAGE_PROFILE['format']}: "
+               f"{stats['bytes_before'] / 1e6:.1f} MB -> {stats['bytes_after'] / 1e6:.1f} MB, "
+               f"decoding all {stats['decode_before']:.2f}s -> {stats['decode_after']:.2f}s")
+    else:
+        report("No stored images to re-encode.")
+    return stats
+
+
+# --- Bulk Import ---
+
+def read_import_rows(path):
+    """Yields (row number, row) for each row of a CSV, JSON Lines or JSON array file as it is read.
+
+    CSV rows are dicts keyed by the header line and numbered by the line
+    they end on. A JSON line that does not parse is yielded as an error
+    message instead of a row.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if extension == '.csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        elif extension == '.json':
+            for number, (item, _) in enumerate(iter_json_array(f), 1):
+                yield number, item
+        else:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    row = f"Invalid JSON: {e.msg}"
+                yield number, row
+
+
+def import_column_map(columns, mapping=None):
+    """Maps the columns of an import file onto entry keys (TEXT_KEYS and 'image_paths').
+
+    Columns match a key or a field label regardless of case, so 'color',
+    'Color' and 'Color:' all work, and 'Images' means 'image_paths'.
+    `mapping` ({column: key}) adds or overrides columns; a key of None
+    drops one. Columns matching nothing, such as 'id', are left out.
+    """
+    names = {"images": "image_paths", "image_paths": "image_paths"}
+    for key in TEXT_KEYS:
+        names[key] = names[key.replace('_', ' ')] = key
+    for label, key in FIELDS:
+        names[label.rstrip(':').lower()] = key
+    column_map = {}
+    for column in columns:
+        key = names.get(str(column).strip().rstrip(':').lower())
+        if key is not None:
+            column_map[column] = key
+    for column, key in (mapping or {}).items():
+        if key is None:
+            column_map.pop(column, None)
+        elif key in names.values():
+            column_map[column] = key
+        else:
+            raise ValueError(f"Unknown field '{key}'")
+    return column_map
+
+
+def import_entry(row, column_map, image_dir):
+    """Turns an import row into (entry without ID, image files it names).
+
+    Raises ValueError with the reason if the row cannot be imported.
+    """
+    if not isinstance(row, dict):
+        raise ValueError(row if isinstance(row, str) else "Expected an object with the entry's fields")
+    entry = dict.fromkeys(TEXT_KEYS, "")
+    images = []
+    for column, value in row.items():
+        key = column_map.get(column)
+        if key is None or value is None:
+            continue
+        if key == 'image_paths':
+            names = value if isinstance(value, list) else str(value).split(IMPORT_IMAGE_SEPARATOR)
+            for name in names:
+                name = str(name).strip()
+                if name:
+                    image_path = os.path.join(image_dir, name)
+                    if not os.path.isfile(image_path):
+                        raise ValueError(f"Image not found: {name}")
+                    images.append(image_path)
+        elif isinstance(value, (dict, list)):
+            raise ValueError(f"'{column}' must be text")
+        else:
+            entry[key] = str(value).strip()
+    if not entry["name"]:
+        raise ValueError("Name is required.")
+    return entry, images
+
+
+def _discard_imported_image(future, used):
+    """Deletes an image a bulk import stored if no imported entry uses it and it was not stored before."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    path, created = future.result()
+    if created and path not in used:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_import(path, mapping=None, image_dir=None, pool=None, progress=None):
+    """Streams an import file into validated new entries and stores the images they name.
+
+    Rows are read one at a time; their images are encoded on `pool` (an
+    executor; one worker process per CPU is started if None) while
+    reading goes on, and an image named by several rows is encoded once.
+    Image names are relative to `image_dir`, by default the import file's
+    folder. `progress(rows read, images done, images named)` is called
+    every IMPORT_PROGRESS_ROWS rows and as the images finish.
+
+    The collection is not touched, so this can run on a worker thread;
+    hand the entries to BottleCollection.add_block(). Returns (entries,
+    errors, stats): the entries in file order, (row number, message) for
+    each rejected row, and the counts of 'rows' and 'images' read. Images
+    this import stored that no returned entry uses are deleted again.
+    """
+    image_dir = image_dir or os.path.dirname(os.path.abspath(path))
+    own_pool = None
+    column_map, seen_columns = {}, set()
+    accepted, errors = [], []
+    images = {}  # source path -> future of the stored path
+    rows = 0
+    used = set()  # stored paths the returned entries point at
+    try:
+        for number, row in read_import_rows(path):
+            rows += 1
+            if isinstance(row, dict) and not seen_columns.issuperset(row):
+                new_columns = [column for column in row if column not in seen_columns]
+                seen_columns.update(new_columns)
+                column_map.update(import_column_map(new_columns, mapping))
+            try:
+                entry, sources = import_entry(row, column_map, image_dir)
+            except ValueError as e:
+                errors.append((number, str(e)))
+                continue
+            for source in sources:
+                if source not in images:
+                    if pool is None:
+                        os.makedirs(IMAGE_DIR, exist_ok=True)
+                        pool = own_pool = worker_pool()
+                    images[source] = pool.submit(import_image, source)
+            accepted.append((number, entry, sources))
+            if progress and rows % IMPORT_PROGRESS_ROWS == 0:
+                progress(rows, sum(future.done() for future in images.values()), len(images))
+
+        for done, _ in enumerate(as_completed(images.values()), 1):
+            if progress:
+                progress(rows, done, len(images))
+        entries = []
+        for number, entry, sources in accepted:
+            try:
+                entry["image_paths"] = [images[source].result()[0] for source in sources]
+            except Exception as e:
+                errors.append((number, f"Could not import image: {e}"))
+                continue
+            used.update(entry["image_paths"])
+            entries.append(entry)
+    finally:
+        # Images of rejected rows, or of every row if reading failed, would be left with no entry.
+        for future in images.values():
+            future.cancel()
+            future.add_done_callback(functools.partial(_discard_imported_image, used=used))
+        if own_pool is not None:
+            own_pool.shutdown(cancel_futures=True)
+    errors.sort()
+    return entries, errors, {"rows": rows, "images": len(images)}
+
+
+# --- Export ---
+
+def _export_progress(bottles, progress):
+    """Yields `bottles`, calling progress(done, total) every EXPORT_PROGRESS_ROWS entries and at the end."""
+    total = len(bottles)
+    done = 0
+    for done, bottle in enumerate(bottles, 1):
+        yield bottle
+        if progress and done % EXPORT_PROGRESS_ROWS == 0:
+            progress(done, total)
+    if progress:
+        progress(done, total)
+
+
+def iter_csv_export(bottles):
+    """Yields the CSV export of `bottles` an entry at a time, with image paths joined by ';'."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, EXPORT_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for bottle in bottles:
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        row = dict(bottle)
+        row['image_paths'] = IMPORT_IMAGE_SEPARATOR.join(bottle.get('image_paths', []))
+        writer.writerow(row)
+    yield buffer.getvalue()
+
+
+def iter_jsonl_export(bottles):
+    """Yields one JSON line per entry."""
+    for bottle in bottles:
+        yield json.dumps(dict(bottle)) + "\n"
+
+
+def iter_json_export(bottles):
+    """Yields the same document as json.dump(data, f, indent=2), an entry at a time."""
+    separator = "[\n  "
+    for bottle in bottles:
+        yield separator + json.dumps(dict(bottle), indent=2).replace("\n", "\n  ")
+        separator = ",\n  "
+    yield "[]" if separator == "[\n  " else "\n]"
+
+
+EXPORTERS = {"csv": iter_csv_export, "jsonl": iter_jsonl_export, "json": iter_json_export}
+
+
+def export_entries(bottles, f, export_format, progress=None):
+    """Writes `bottles` to the text file `f` as 'csv', 'jsonl' or 'json', one entry at a time.
+
+    Only the entry being written is ever converted, so memory use does
+    not grow with the collection.
+    """
+    for chunk in EXPORTERS[export_format](_export_progress(bottles, progress)):
+        f.write(chunk)
+
+
+_CATALOG_STYLE = """\
+body { font-family: sans-serif; margin: 0 auto; max-width: 1100px; padding: 0 20px; color: #222; }
+header { display: flex; align-items: baseline; justify-content: space-between; }
+nav { display: flex; gap: 20px; justify-content: center; margin: 20px 0; }
+.entry { display: flex; gap: 20px; padding: 15px 0; border-top: 1px solid #ddd; }
+.entry img, .no-image { width: 250px; height: 250px; object-fit: contain; flex: none; background: #e0e0e0; }
+.entry h2 { margin: 0; }
+.entry .id { color: #777; margin: 4px 0 10px; }
+dl { display: grid; grid-template-columns: max-content 1fr; gap: 4px 15px; margin: 0; }
+dt { font-weight: bold; }
+dd { margin: 0; white-space: pre-line; }
+"""
+
+
+def export_thumbnail(path, destination):
+    """Writes the EntryCard thumbnail of `path` to `destination` as a JPEG, rendering it only on a cache miss."""
+    thumb = load_thumbnail(path, THUMB_SIZES[0])
+    if thumb.mode != 'RGB':
+        thumb = thumb.convert('RGB')
+    temp_path = f"{destination}.{os.getpid()}.tmp"
+    thumb.save(temp_path, "JPEG", quality=85)
+    os.replace(temp_path, destination)
+    return destination
+
+
+def _catalog_page_name(page):
+    return "index.html" if page == 1 else f"page{page}.html"
+
+
+def _catalog_card(bottle, thumb):
+    escape = html.escape
+    rows = [(label.rstrip(':'), bottle.get(key)) for label, key in FIELDS if key != 'name']
+    rows.append(("Related Addresses", bottle.get('addresses')))
+    links = []
+    for line in str(bottle.get('links') or '').splitlines():
+        line = line.strip()
+        if line.startswith(("http://", "https://")):
+            links.append(f'<a href="{escape(line)}">{escape(line)}</a>')
+        elif line:
+            links.append(escape(line))
+    details = "".join(f"<dt>{escape(label)}</dt><dd>{escape(str(value))}</dd>" for label, value in rows if value)
+    if links:
+        details += f"<dt>Related Links</dt><dd>{'<br>'.join(links)}</dd>"
+    image = (f'<img src="{thumb}" alt="" loading="lazy">' if thumb else '<div class="no-image"></div>')
+    return (f'<article class="entry" id="{escape(bottle.get("id", ""))}">{image}<div>'
+            f'<h2>{escape(bottle.get("name", ""))}</h2><p class="id">{escape(bottle.get("id", ""))}</p>'
+            f'<dl>{details}</dl></div></article>\n')
+
+
+def _write_catalog_page(directory, page, pages, total, cards):
+    def link(target, text):
+        if target == page or not 1 <= target <= pages:
+            return f"<span>{text}</span>"
+        return f'<a href="{_catalog_page_name(target)}">{text}</a>'
+
+    nav = (f"<nav>{link(1, '&laquo; First')} {link(page - 1, '&lsaquo; Previous')} "
+           f"<span>Page {page} of {pages}</span> {link(page + 1, 'Next &rsaquo;')} {link(pages, 'Last &raquo;')}</nav>\n")
+    with open(os.path.join(directory, _catalog_page_name(page)), 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+                f'<title>EntryDex Catalog - Page {page} of {pages}</title>\n'
+                '<link rel="stylesheet" href="style.css">\n</head>\n<body>\n'
+                f'<header><h1>EntryDex Catalog</h1><p>{total} entries</p></header>\n')
+        f.write(nav)
+        f.writelines(cards)
+        f.write(nav)
+        f.write('</body>\n</html>\n')
+
+
+def export_html(bottles, directory, pool=None, progress=None):
+    """Writes a static HTML catalog of `bottles` to `directory`, EXPORT_PAGE_SIZE entries per page.
+
+    Pages are written as the entries stream past. Thumbnails of each
+    entry's first image are rendered on `pool` (one worker process per
+    CPU is started if None) with only a few in flight at a time, so
+    memory use stays flat however large the collection is. Thumbnails
+    from an earlier export are kept unless their image has changed since.
+    Returns a dict with the numbers of 'pages', 'thumbnails' rendered and
+    thumbnails 'failed'.
+    """
+    os.makedirs(os.path.join(directory, "thumbs"), exist_ok=True)
+    with open(os.path.join(directory, "style.css"), 'w', encoding='utf-8') as f:
+        f.write(_CATALOG_STYLE)
+    total = len(bottles)
+    pages = max(1, -(-total // EXPORT_PAGE_SIZE))
+    stats = {"pages": pages, "thumbnails": 0, "failed": 0}
+    own_pool = None
+    in_flight = deque()  # (destination, future), oldest first
+    rendering = set()  # Destinations in flight; an image shared by several entries is rendered once
+
+    def finish_oldest():
+        destination, future = in_flight.popleft()
+        rendering.discard(destination)
+        try:
+            future.result()
+            stats["thumbnails"] += 1
+        except Exception:
+            stats["failed"] += 1
+
+    try:
+        entries = _export_progress(bottles, progress)
+        for page in range(1, pages + 1):
+            cards = []
+            for bottle in itertools.islice(entries, EXPORT_PAGE_SIZE):
+                paths = bottle.get('image_paths') or []
+                thumb = None
+                if paths and os.path.exists(paths[0]):
+                    thumb = f"thumbs/{_thumbnail_prefix(paths[0])}.jpg"
+                    destination = os.path.join(directory, thumb)
+                    if destination not in rendering and (not os.path.exists(destination) or
+                                                         os.path.getmtime(destination) < os.path.getmtime(paths[0])):
+                        if pool is None:
+                            pool = own_pool = worker_pool()
+                        in_flight.append((destination, pool.submit(export_thumbnail, paths[0], destination)))
+                        rendering.add(destination)
+                        if len(in_flight) > 4 * (os.cpu_count() or 1):
+                            finish_oldest()
+                cards.append(_catalog_card(bottle, thumb))
+            _write_catalog_page(directory, page, pages, total, cards)
+        while in_flight:
+            finish_oldest()
+        if progress:
+            progress(total, total)
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown(cancel_futures=True)
+    return stats
@@ -0,0 +1,490 @@
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import entrydex_core as core  # noqa: E402
+
+
+# --- Storage ---
+
+def test_iter_json_array_across_chunk_boundaries():
+    items = [{"id": f"BTL{i:03d}", "name": "Soda [1] {x}", "links": "a\nb"} for i in range(20)]
+    text = " \n" + json.dumps(items, indent=2) + "\n"
+    for chunk_size in (1, 7, 64, len(text) + 1):
+        parsed = list(core.iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+        assert [item for item, _ in parsed] == items
+        assert parsed[-1][1] <= len(text)
+    assert list(core.iter_json_array(io.StringIO("[ ]"), chunk_size=1)) == []
+    assert [item for item, _ in core.iter_json_array(io.StringIO("   \n  [1]"), chunk_size=2)] == [1]
+
+
+def test_iter_json_array_rejects_truncated_files():
+    with pytest.raises(json.JSONDecodeError):
+        list(core.iter_json_array(io.StringIO('[{"id": "BTL001"}, {"id"'), chunk_size=4))
+    with pytest.raises(json.JSONDecodeError):
+        list(core.iter_json_array(io.StringIO('{"id": "BTL001"}')))
+
+
+def test_read_journal_keeps_the_last_change_and_skips_a_torn_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    core.append_journal([('put', {"id": "BTL001", "name": "Old"}), ('put', {"id": "BTL002", "name": "Gone"})])
+    core.append_journal([('put', {"id": "BTL001", "name": "New"}), ('delete', {"id": "BTL002"})])
+    with open(core.JOURNAL_FILE, 'a') as f:
+        f.write('{"op":"put","bottle":{"id":"BTL0')
+    assert core.read_journal() == {"BTL001": {"id": "BTL001", "name": "New"}, "BTL002": None}
+
+
+def test_append_journal_after_a_torn_line_keeps_later_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    core.append_journal([('put', {"id": "BTL001", "name": "First"})])
+    with open(core.JOURNAL_FILE, 'a') as f:
+        f.write('{"op":"put","bottle":{"id":"BTL0')
+    core.append_journal([('put', {"id": "BTL002", "name": "Second"})])
+    core.append_journal([('delete', {"id": "BTL001"}), ('put', {"id": "BTL003", "name": "Third"})])
+    assert core.read_journal() == {"BTL001": None,
+                                   "BTL002": {"id": "BTL002", "name": "Second"},
+                                   "BTL003": {"id": "BTL003", "name": "Third"}}
+    with open(core.JOURNAL_FILE, 'a') as f:
+        f.write('{"op":"pu')
+    core.append_journal([('put', {"id": "BTL004", "name": "Fourth"})])
+    with open(core.JOURNAL_FILE) as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_iter_batches_replays_the_journal_over_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(core.DATA_FILE, 'w') as f:
+        json.dump([{"id": f"BTL{i:03d}", "name": f"Bottle {i}", "image_paths": []} for i in range(1, 6)], f)
+    core.append_journal([('put', {"id": "BTL002", "name": "Edited", "image_paths": []}),
+                         ('delete', {"id": "BTL004"}),
+                         ('put', {"id": "BTL006", "name": "Added", "image_paths": []})])
+    storage = core.JsonStorage()
+    batches = list(storage.iter_batches(2))
+    entries = [entry for batch, _ in batches for entry in batch]
+    assert [entry["id"] for entry in entries] == ["BTL001", "BTL002", "BTL003", "BTL005", "BTL006"]
+    assert entries[1]["name"] == "Edited"
+    assert batches[-1][1] == 1.0
+    assert storage.wants_snapshot(closing=True)
+
+
+def test_an_unreadable_snapshot_is_kept_aside_instead_of_compacted_over(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(core.DATA_FILE, 'w') as f:
+        f.write('[{"id": "BTL001"}, {"id": ')
+    storage = core.JsonStorage()
+    with pytest.raises(json.JSONDecodeError):
+        list(storage.iter_batches(10))
+    assert storage.load_failed and not storage.wants_snapshot(closing=True)
+    storage.save_all([{"id": "BTL002", "name": "New", "image_paths": []}])
+    kept = [name for name in os.listdir() if name.startswith(core.DATA_FILE + ".unreadable-")]
+    assert len(kept) == 1
+    with open(kept[0]) as f:
+        assert f.read() == '[{"id": "BTL001"}, {"id": '
+    assert not storage.load_failed
+
+
+def test_sqlite_storage_round_trip(tmp_path):
+    path = str(tmp_path / "bottles.db")
+    storage = core.SqliteStorage(path)
+    storage.save_all([
+        {"id": "BTL001", "name": "Soda", "color": "amber", "image_paths": ["images/a.png", "images/b.png"],
+         "note": "kept in the extra column"},
+        {"id": "BTL002", "name": "Flask", "image_paths": []},
+    ])
+    storage.write_changes([('put', {"id": "BTL002", "name": "Flask 2", "image_paths": ["images/c.png"]}),
+                           ('put', {"id": "BTL003", "name": "Jar", "image_paths": []}),
+                           ('delete', {"id": "BTL003"})])
+    storage.close()
+    storage = core.SqliteStorage(path)
+    try:
+        assert storage.load() == [
+            {"id": "BTL001", "name": "Soda", "color": "amber", "note": "kept in the extra column",
+             "image_paths": ["images/a.png", "images/b.png"]},
+            {"id": "BTL002", "name": "Flask 2", "image_paths": ["images/c.png"]},
+        ]
+    finally:
+        storage.close()
+
+
+def test_sqlite_backend_migrates_the_json_collection(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(core.DATA_FILE, 'w') as f:
+        json.dump([{"id": "BTL001", "name": "Soda", "image_path": "images/a.png"},
+                   {"id": "BTL002", "name": "Flask", "image_paths": []}], f)
+    core.append_journal([('put', {"id": "BTL003", "name": "Jar", "image_paths": []}), ('delete', {"id": "BTL002"})])
+    monkeypatch.setattr(core, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(core, "_storage", None)
+    storage = core.get_storage()
+    try:
+        assert os.path.exists(core.SQLITE_FILE)
+        assert storage.load() == [{"id": "BTL001", "name": "Soda", "image_paths": ["images/a.png"]},
+                                  {"id": "BTL003", "name": "Jar", "image_paths": []}]
+    finally:
+        storage.close()
+
+
+# --- Collection ---
+
+def test_bottle_collection_ids_and_positions():
+    collection = core.BottleCollection([{"id": "BTL010", "name": "B"}, {"id": "BTL002", "name": "A"},
+                                        {"id": "BTL005", "name": "C"}])
+    assert collection.next_id() == "BTL011"
+    assert [collection.position(i) for i in ("BTL002", "BTL005", "BTL010", "BTL003")] == [0, 1, 2, -1]
+    collection.add({"id": "BTL003", "name": "D"})
+    assert collection.position("BTL005") == 2 and collection.next_id() == "BTL011"
+    collection.add({"id": collection.next_id(), "name": "E"})
+    collection.remove("BTL011")
+    assert collection.next_id() == "BTL012"  # Deleted IDs are not handed out again
+    assert core.generate_id(collection) == "BTL012"
+    assert [bottle["id"] for bottle in collection.in_id_order()] == ["BTL002", "BTL003", "BTL005", "BTL010"]
+    assert core.find_bottle_by_id("BTL005", collection)[1] == 2
+    with pytest.raises(ValueError):
+        collection.add({"id": "BTL002", "name": "Duplicate"})
+
+
+def test_add_block_reserves_consecutive_ids():
+    collection = core.BottleCollection([{"id": "BTL007", "name": "A"}])
+    added = collection.add_block([{"id": "X", "name": "B"}, {"name": "C"}])
+    assert [bottle["id"] for bottle in added] == ["BTL008", "BTL009"]
+    assert collection.get("BTL009")["name"] == "C" and collection.position("BTL009") == 2
+    assert collection.next_id() == "BTL010"
+
+
+def test_change_tracker_nets_out_changes_between_drains():
+    collection = core.BottleCollection([{"id": "BTL001", "name": "A"}, {"id": "BTL002", "name": "B"}])
+    tracker = core.ChangeTracker()
+    collection.add_observer(tracker)
+    assert tracker.drain() == ({"BTL001", "BTL002"}, set(), set())
+    assert not tracker
+    collection.add({"id": "BTL003", "name": "C"})
+    collection.update("BTL003", {"name": "C2"})  # Still just an add to the view
+    collection.update("BTL001", {"name": "A2"})
+    collection.remove("BTL002")
+    collection.add({"id": "BTL002", "name": "B2"})  # Deleted and re-added: modified
+    collection.add({"id": "BTL004", "name": "D"})
+    collection.remove("BTL004")  # Added and deleted: nothing to show
+    assert tracker
+    assert tracker.drain() == ({"BTL003"}, {"BTL001", "BTL002"}, set())
+    collection.remove("BTL001")
+    assert tracker.drain() == (set(), set(), {"BTL001"})
+
+
+# --- Search ---
+
+QUERIES = ["soda", "amber", "btl0003", "boston", "co", "a", "1890", "xyz", "s & c", "mbe", " "]
+
+
+def sample_collection():
+    names = ["Boston Soda Works", "Amber Bitters", "S & C Mineral Water", "Hutchinson Soda", "Cobalt Poison"]
+    colors = ["amber", "aqua", "cobalt blue", "clear", "Amber"]
+    return core.BottleCollection([
+        {"id": f"BTL{i:04d}", "name": names[i % 5], "color": colors[i % 3], "era": f"18{90 + i % 10}s",
+         "image_paths": [], "links": ""}
+        for i in range(1, 41)
+    ])
+
+
+def assert_index_matches_scan(index, collection):
+    for query in QUERIES:
+        expected = {bottle.get('id') for bottle in core.search_bottles(collection, query)}
+        assert index.search(query) == expected, query
+
+
+def test_search_index_matches_scan_while_partly_indexed():
+    collection = sample_collection()
+    index = core.SearchIndex()
+    collection.add_observer(index)
+    assert_index_matches_scan(index, collection)  # Nothing indexed yet
+    index.index_pending(limit=15)
+    assert_index_matches_scan(index, collection)
+    index.index_pending()
+    assert_index_matches_scan(index, collection)
+
+
+def test_search_index_follows_changes():
+    collection = sample_collection()
+    index = core.SearchIndex()
+    collection.add_observer(index)
+    index.index_pending()
+    collection.update("BTL0001", {"name": "Xyz Cure"})
+    collection.remove("BTL0002")
+    collection.add({"id": "BTL0100", "name": "Amberina Flask", "image_paths": []})
+    assert_index_matches_scan(index, collection)
+    index.index_pending()
+    assert_index_matches_scan(index, collection)
+
+
+def test_search_within_narrows_previous_matches():
+    collection = sample_collection()
+    index = core.SearchIndex()
+    collection.add_observer(index)
+    index.index_pending(limit=20)
+    within = index.search("so")
+    assert index.search("soda", within) == index.search("soda")
+
+
+def test_search_does_not_wait_for_the_index():
+    collection = sample_collection()
+    index = core.SearchIndex()
+    collection.add_observer(index)
+    index.index_pending(limit=10)
+    index.search("soda")
+    index.search("so")
+    assert len(index._pending) == len(collection) - 10
+
+
+# --- Persistence ---
+
+def test_persistence_worker_snapshot_supersedes_earlier_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    worker = core.PersistenceWorker(core.JsonStorage())
+    worker.record(None, 'put', {"id": "BTL001", "name": "Journaled"})
+    worker.save([{"id": "BTL001", "name": "Snapshot"}])
+    worker.record(None, 'put', {"id": "BTL002", "name": "After"})
+    worker.close()
+    assert core.JsonStorage().load() == [{"id": "BTL001", "name": "Snapshot"}, {"id": "BTL002", "name": "After"}]
+
+
+def test_persistence_worker_writes_bottles_as_they_were_when_queued(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(core, "SAVE_COALESCE_SECONDS", 0.2)
+    collection = core.BottleCollection([{"id": "BTL001", "name": "Old", "custom": "x"}, {"id": "BTL002", "type": "Soda"}])
+    worker = core.PersistenceWorker(core.JsonStorage())
+    worker.save(collection)
+    worker.record(collection, 'put', collection.get("BTL002"))
+    collection.update("BTL001", {"name": "New"})
+    collection.update("BTL002", {"type": "Ink"})
+    worker.close()
+    assert core.JsonStorage().load() == [{"id": "BTL001", "name": "Old", "custom": "x"}, {"id": "BTL002", "type": "Soda"}]
+    assert list(collection.get("BTL001").values()) == ["BTL001", "New", "x"]
+
+
+class FlakyStorage:
+    supports_changes = True
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.written = []
+
+    def wants_snapshot(self, closing=False):
+        return False
+
+    def write_changes(self, changes):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.written.extend(changes)
+
+    def close(self):
+        pass
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_persistence_worker_retries_failed_writes(monkeypatch):
+    monkeypatch.setattr(core, "SAVE_COALESCE_SECONDS", 0)
+    monkeypatch.setattr(core, "SAVE_RETRY_SECONDS", 0.01)
+    storage = FlakyStorage(failures=2)
+    errors = []
+    worker = core.PersistenceWorker(storage, on_error=errors.append)
+    worker.record(None, 'put', {"id": "BTL001"})
+    worker.record(None, 'delete', {"id": "BTL002"})
+    wait_for(lambda: len(storage.written) == 2)
+    worker.close()
+    assert [op for op, _ in storage.written] == ['put', 'delete']
+    assert len(errors) == 1 and worker.error is None
+
+
+def test_persistence_worker_runs_on_written_after_the_write(monkeypatch):
+    monkeypatch.setattr(core, "SAVE_COALESCE_SECONDS", 0)
+    monkeypatch.setattr(core, "SAVE_RETRY_SECONDS", 0.01)
+    storage = FlakyStorage(failures=1)
+    seen = []
+    worker = core.PersistenceWorker(storage)
+    worker.record(None, 'delete', {"id": "BTL001"}, on_written=lambda: seen.append(len(storage.written)))
+    wait_for(lambda: seen)
+    worker.close()
+    assert seen == [1]
+
+
+# --- Reports ---
+
+def test_report_aggregates_follow_updates_and_removes():
+    collection = core.BottleCollection([
+        {"id": "BTL001", "name": "A", "type": "soda", "color": "amber", "condition": "Good"},
+        {"id": "BTL002", "name": "B", "type": " Soda", "color": "aqua", "condition": "good"},
+        {"id": "BTL003", "name": "C", "type": "flask", "color": "Amber", "condition": ""},
+    ])
+    aggregates = core.ReportAggregates()
+    collection.add_observer(aggregates)
+    assert aggregates.counts("type") == {"Soda": 2, "Flask": 1}
+    assert aggregates.counts("condition") == {"Good": 2, "Unknown": 1}
+    collection.update("BTL001", {"type": "Flask", "color": "clear"})
+    collection.remove("BTL002")
+    assert aggregates.members("type") == {"Flask": {"BTL001", "BTL003"}}
+    assert aggregates.counts("color") == {"Clear": 1, "Amber": 1}
+    collection.add({"id": "BTL004", "name": "D", "type": "jar", "color": "aqua", "condition": "Good"})
+    assert aggregates.counts("type") == {"Flask": 2, "Jar": 1}
+    assert aggregates.counts("color") == {"Clear": 1, "Amber": 1, "Aqua": 1}
+
+
+# --- Analytics ---
+
+def test_collection_columns_counts_cross_tab_and_era_histogram():
+    collection = core.BottleCollection([
+        {"id": "BTL001", "name": "A", "type": "soda", "color": "amber", "era": "1880-1900", "location": "Shelf A1"},
+        {"id": "BTL002", "name": "B", "type": "Soda ", "color": "aqua", "era": "1890s", "location": "Shelf A2"},
+        {"id": "BTL003", "name": "C", "type": "flask", "color": "amber", "era": "", "location": "Box 3"},
+        {"id": "BTL004", "name": "D", "type": "flask", "color": "clear", "era": "c. 1905", "location": "Shelf A1"},
+    ])
+    columns = core.CollectionColumns()
+    collection.add_observer(columns)
+    assert columns.counts("type") == {"Soda": 2, "Flask": 2}
+    assert columns.cross_tab("type", "color") == (["Flask", "Soda"], ["Amber", "Aqua", "Clear"],
+                                                  [[1, 0, 1], [1, 1, 0]])
+    assert columns.era_histogram() == ([(1880, 1), (1890, 2), (1900, 2)], 1)
+    assert columns.location_summary()[0] == ("Shelf A", 3, [("Shelf A1", 2), ("Shelf A2", 1)])
+
+    collection.update("BTL004", {"era": "1920s"})
+    collection.remove("BTL001")
+    collection.add({"id": "BTL005", "name": "E", "type": "jar", "color": "aqua", "era": "unknown"})
+    assert len(columns) == 4
+    assert columns.counts("color") == {"Aqua": 2, "Amber": 1, "Clear": 1}
+    assert columns.era_histogram() == ([(1890, 1), (1900, 0), (1910, 0), (1920, 1)], 2)
+
+
+def test_parse_era(monkeypatch):
+    monkeypatch.setattr(core, "_eras", {})
+    assert core.parse_era("1880-1900") == (1880, 1900)
+    assert core.parse_era("1900-20") == (1900, 1920)
+    assert core.parse_era("1890s") == (1890, 1899)
+    assert core.parse_era("1800s") == (1800, 1899)
+    assert core.parse_era("Late 1800s") == (1866, 1899)
+    assert core.parse_era("c. 1875") == (1875, 1875)
+    assert core.parse_era("unknown") is None
+    assert core._eras["1890s"] == (1890, 1899)
+
+
+def test_parse_era_two_digit_end_years(monkeypatch):
+    monkeypatch.setattr(core, "_eras", {})
+    assert core.parse_era("1890-10") == (1890, 1910)
+    assert core.parse_era("1920s-30s") == (1920, 1939)
+    assert core.parse_era("1850-60s") == (1850, 1869)
+
+
+# --- Bulk Import ---
+
+def test_import_column_map_matches_keys_and_labels():
+    columns = ["Name", "color:", "Era/Date Range", "Images", "id", "Notes"]
+    assert core.import_column_map(columns) == {
+        "Name": "name", "color:": "color", "Era/Date Range": "era", "Images": "image_paths"}
+    assert core.import_column_map(columns, {"Notes": "embossing", "color:": None}) == {
+        "Name": "name", "Era/Date Range": "era", "Images": "image_paths", "Notes": "embossing"}
+    with pytest.raises(ValueError, match="Unknown field 'nonsense'"):
+        core.import_column_map(columns, {"id": "nonsense"})
+
+
+def test_import_entry(tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"")
+    (tmp_path / "b.jpg").write_bytes(b"")
+    column_map = core.import_column_map(["name", "color", "images", "id"])
+    entry, images = core.import_entry({"name": " Soda ", "color": 3, "images": "a.jpg; b.jpg;", "id": "X"},
+                                      column_map, str(tmp_path))
+    assert entry["name"] == "Soda" and entry["color"] == "3" and entry["era"] == ""
+    assert "id" not in entry
+    assert images == [str(tmp_path / "a.jpg"), str(tmp_path / "b.jpg")]
+    assert core.import_entry({"name": "Flask", "images": ["a.jpg"]}, column_map, str(tmp_path))[1] == [
+        str(tmp_path / "a.jpg")]
+
+
+def test_import_entry_rejects_bad_rows(tmp_path):
+    column_map = core.import_column_map(["name", "color", "images"])
+    for row, reason in [({"color": "amber"}, "Name is required."),
+                        ({"name": "Soda", "images": "missing.jpg"}, "Image not found: missing.jpg"),
+                        ({"name": "Soda", "color": {"a": 1}}, "'color' must be text"),
+                        (["Soda"], "Expected an object with the entry's fields")]:
+        with pytest.raises(ValueError, match=re.escape(reason)):
+            core.import_entry(row, column_map, str(tmp_path))
+
+
+def test_read_import_deletes_images_only_rejected_rows_stored(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from PIL import Image
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(core.IMAGE_DIR)
+    for name, color in [("kept.png", "red"), ("orphan.png", "blue"), ("existing.png", "green")]:
+        Image.new("RGB", (8, 8), color).save(tmp_path / name)
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    with Image.open(tmp_path / "existing.png") as image:
+        existing = core.store_image(image)
+    (tmp_path / "import.csv").write_text("name,images\n"
+                                         "Kept,kept.png\n"
+                                         "Broken,orphan.png;existing.png;broken.png\n")
+    with ThreadPoolExecutor(2) as pool:
+        entries, errors, stats = core.read_import(str(tmp_path / "import.csv"), pool=pool)
+    assert [entry["name"] for entry in entries] == ["Kept"]
+    assert [number for number, _ in errors] == [3]
+    assert sorted(os.listdir(core.IMAGE_DIR)) == sorted(
+        os.path.basename(path) for path in entries[0]["image_paths"] + [existing])
+
+
+# --- Export ---
+
+EXPORT_ENTRIES = [
+    {"id": "BTL001", "name": "<b>Soda</b> & Co", "color": "amber",
+     "links": "https://example.com/?a=1&b=2\nnot a link", "image_paths": ["images/a.png", "images/b.png"]},
+    {"id": "BTL002", "name": "Flask", "era": "1890s", "addresses": "1 Main St\nBoston", "image_paths": []},
+]
+
+
+def test_export_json_and_jsonl():
+    progress = []
+    f = io.StringIO()
+    core.export_entries(EXPORT_ENTRIES, f, "json", lambda done, total: progress.append((done, total)))
+    assert f.getvalue() == json.dumps(EXPORT_ENTRIES, indent=2)
+    assert progress[-1] == (2, 2)
+    f = io.StringIO()
+    core.export_entries([], f, "json")
+    assert json.loads(f.getvalue()) == []
+    f = io.StringIO()
+    core.export_entries(EXPORT_ENTRIES, f, "jsonl")
+    assert [json.loads(line) for line in f.getvalue().splitlines()] == EXPORT_ENTRIES
+
+
+def test_export_csv():
+    f = io.StringIO()
+    core.export_entries(EXPORT_ENTRIES, f, "csv")
+    f.seek(0)
+    reader = csv.DictReader(f)
+    rows = list(reader)
+    assert reader.fieldnames == core.EXPORT_COLUMNS
+    assert rows[0]["name"] == "<b>Soda</b> & Co" and rows[0]["links"] == "https://example.com/?a=1&b=2\nnot a link"
+    assert rows[0]["image_paths"] == "images/a.png;images/b.png"
+    assert rows[1]["addresses"] == "1 Main St\nBoston" and rows[1]["image_paths"] == ""
+
+
+def test_export_html_escapes_and_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "EXPORT_PAGE_SIZE", 1)
+    stats = core.export_html(EXPORT_ENTRIES, str(tmp_path))
+    assert stats == {"pages": 2, "thumbnails": 0, "failed": 0}  # The images do not exist, so none are rendered
+    first = (tmp_path / "index.html").read_text(encoding='utf-8')
+    assert "&lt;b&gt;Soda&lt;/b&gt; &amp; Co" in first and "<b>Soda" not in first
+    assert '<a href="https://example.com/?a=1&amp;b=2">' in first and "<dd>amber</dd>" in first
+    assert "not a link" in first and 'href="not a link"' not in first
+    assert "Page 1 of 2" in first and 'href="page2.html"' in first
+    second = (tmp_path / "page2.html").read_text(encoding='utf-8')
+    assert "Flask" in second and "Soda" not in second and 'href="index.html"' in second
+    assert (tmp_path / "style.css").exists()